@@ -0,0 +1 @@
+from .canvas import *
\ No newline at end of file
@@ -0,0 +1,282 @@
+import contextlib
+import logging
+import re
+import sys
+from array import array
+from typing import Iterator, List, TextIO, Tuple, Union
+
+import blessed as bl
+
+class canvas():
+    """
+    An in-memory grid of cells which tiles draw into instead of the terminal.
+
+    The canvas offers the parts of the terminal interface the tiles use, `width`, `height`, `location` and the cursor movements, and collects everything printed while it is the standard output. Every cell holds a character and a style, where the style is an index into a table of the SGR sequences seen so far. Drawing only changes the cells. `flush` compares the cells with the frame that was last written to the terminal and writes only the runs of cells that changed, with a single write to the terminal per frame. Every row remembers the span of cells drawn since the last flush, so only those cells are compared.
+
+    Drawing can be clipped to a rectangle with `clip`, which keeps every tile inside its own region. A region can be scrolled left by a column with `scroll`. On terminals with left and right margins the terminal scrolls the region itself, so only the cells drawn into the region afterwards are written.
+
+    Args:
+
+        Term:
+            The terminal the canvas is shown on
+        Stream:
+            Where the frames are written to. Defaults to the standard output at the time the canvas is created.
+    """
+    def __init__(self, term: bl.Terminal, stream: TextIO = None) -> None:
+        self.term = term
+        self.stream = stream if stream else sys.stdout
+
+        self.x = 0
+        self.y = 0
+        self.style = 0
+
+        self._styles: List[str] = [""]
+        self._style_ids = {"": 0}
+        self._clear = True
+        self._margins = False
+        self._scrolls: List[Tuple[int, int, int, int]] = []
+
+        self.resize()
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    def resize(self) -> None:
+        """
+        Matches the size of the grid to the terminal. The next flush clears the terminal and writes every cell.
+        """
+        self._width, self._height = self.term.width, self.term.height
+
+        self._chars = [[" "] * self._width for _ in range(self._height)]
+        self._attrs = [array("H", [0]) * self._width for _ in range(self._height)]
+
+        # Nothing is known about what the terminal shows, so every cell of the previous frame differs from every cell drawn
+        self._shown_chars = [[None] * self._width for _ in range(self._height)]
+        self._shown_attrs = [array("H", [0]) * self._width for _ in range(self._height)]
+        self._clear = True
+        self._scrolls.clear()
+        self._clip = (0, 0, self._width, self._height)
+
+        # The first and last cell of every row drawn since the last flush
+        self._dirty_start = array("l", [0]) * self._height
+        self._dirty_stop = array("l", [self._width]) * self._height
+
+    def probe(self) -> None:
+        """
+        Asks the terminal whether it supports left and right margins, which `scroll` needs to have the terminal move a region. The terminal has to be in cbreak mode to answer, and terminals which do not answer in time are assumed not to support them.
+        """
+        query = getattr(self.term, "get_dec_mode", None)
+        self._margins = query is not None and query(_margin_mode, timeout=_probe_timeout).supported
+        logging.info(f"The terminal {'supports' if self._margins else 'does not support'} left and right margins")
+
+    @contextlib.contextmanager
+    def location(self, x: int = None, y: int = None) -> Iterator[None]:
+        saved = self.x, self.y
+        self.x = self.x if x is None else x
+        self.y = self.y if y is None else y
+        try:
+            yield
+        finally:
+            self.x, self.y = saved
+
+    @contextlib.contextmanager
+    def clip(self, x: int, y: int, width: int, height: int) -> Iterator[None]:
+        """
+        Drops everything drawn outside of a rectangle, and outside of any rectangle it is nested in, until the context exits.
+        """
+        saved = self._clip
+        left, top, right, bottom = saved
+        self._clip = (max(x, left), max(y, top), min(x + width, right), min(y + height, bottom))
+        try:
+            yield
+        finally:
+            self._clip = saved
+
+    def move_xy(self, x: int, y: int) -> str:
+        return f"\x1b[{y+1};{x+1}H"
+
+    def move_x(self, x: int) -> str:
+        return f"\x1b[{x+1}G"
+
+    def move_down(self, n: int = 1) -> str:
+        return f"\x1b[{n}B"
+
+    def move_right(self, n: int = 1) -> str:
+        return f"\x1b[{n}C"
+
+    def move_left(self, n: int = 1) -> str:
+        return f"\x1b[{n}D"
+
+    def write(self, text: str) -> int:
+        """
+        Draws text at the cursor, following the cursor movements and SGR sequences it contains. Text outside the grid is dropped.
+        """
+        pos = 0
+        for m in _control.finditer(text):
+            self._put(text[pos:m.start()])
+            self._control(m.group(1), m.group(2))
+            pos = m.end()
+        self._put(text[pos:])
+
+        return len(text)
+
+    def scroll(self, x: int, y: int, width: int, height: int) -> None:
+        """
+        Scrolls a region of the grid left by one column, leaving the last column of the region blank.
+
+        If the terminal supports left and right margins the region is scrolled on the terminal as well, which the next flush does before writing any cells. Otherwise the terminal is left as it is and the flush writes the cells of the region that changed.
+        """
+        x, stop = max(x, 0), min(x + width, self._width)
+        if stop - x < 1:
+            return
+
+        rows = range(max(y, 0), min(y + height, self._height))
+        grids = [(self._chars, self._attrs)]
+        # A single column cannot be set as the margins, and scrolling it is only clearing it anyway
+        if self._margins and not self._clear and stop - x > 1:
+            grids.append((self._shown_chars, self._shown_attrs))
+            self._scrolls.append((x, stop, rows.start, rows.stop))
+
+        # Deleting the first cell and inserting a blank one moves the cells of the row in place
+        for chars, attrs in grids:
+            for i in rows:
+                del chars[i][x], attrs[i][x]
+                chars[i].insert(stop - 1, " ")
+                attrs[i].insert(stop - 1, 0)
+
+        for i in rows:
+            if len(grids) == 1:
+                self._mark(i, x, stop)
+            elif self._dirty_start[i] < self._dirty_stop[i] and x < self._dirty_start[i] < stop:
+                # Cells drawn into the region before it scrolled moved a column to the left
+                self._dirty_start[i] -= 1
+
+    def flush(self) -> None:
+        """
+        Writes every cell that changed since the last flush to the terminal.
+        """
+        out = ["\x1b[2J"] if self._clear else []
+        self._clear = False
+
+        # The margins are only enabled while the regions are scrolled, since they change what other sequences mean
+        if self._scrolls:
+            out.append("\x1b[0m\x1b[?69h")
+            for x, stop, start_y, stop_y in self._scrolls:
+                out.append(f"\x1b[{x+1};{stop}s")
+                out.extend(f"\x1b[{y+1};{x+1}H\x1b[P" for y in range(start_y, stop_y))
+            out.append("\x1b[s\x1b[?69l")
+            self._scrolls.clear()
+
+        style = 0
+        for y in range(self._height):
+            first, last = self._dirty_start[y], self._dirty_stop[y]
+            if first >= last:
+                continue
+            self._dirty_start[y], self._dirty_stop[y] = self._width, 0
+
+            chars, attrs = self._chars[y], self._attrs[y]
+            shown_chars, shown_attrs = self._shown_chars[y], self._shown_attrs[y]
+            for start, stop in _changed_runs(chars, attrs, shown_chars, shown_attrs, first, last):
+                out.append(f"\x1b[{y+1};{start+1}H")
+                for x in range(start, stop):
+                    if attrs[x] != style:
+                        style = attrs[x]
+                        out.append("\x1b[0m" + self._styles[style])
+                    out.append(chars[x])
+
+            shown_chars[first:last] = chars[first:last]
+            shown_attrs[first:last] = attrs[first:last]
+
+        if style:
+            out.append("\x1b[0m")
+
+        if out:
+            self.stream.write("".join(out))
+        self.stream.flush()
+
+    def _put(self, text: str) -> None:
+        left, top, right, bottom = self._clip
+        for i, line in enumerate(text.split("\n")):
+            if i:
+                self.x, self.y = 0, self.y + 1
+            if not line or not top <= self.y < bottom:
+                self.x += len(line)
+                continue
+
+            start, stop = max(self.x, left), min(self.x + len(line), right)
+            if start < stop:
+                self._chars[self.y][start:stop] = line[start-self.x:stop-self.x]
+                self._attrs[self.y][start:stop] = array("H", [self.style]) * (stop - start)
+                self._mark(self.y, start, stop)
+            self.x += len(line)
+
+    def _mark(self, y: int, start: int, stop: int) -> None:
+        if start < self._dirty_start[y]:
+            self._dirty_start[y] = start
+        if stop > self._dirty_stop[y]:
+            self._dirty_stop[y] = stop
+
+    def _control(self, params: str, command: str) -> None:
+        values = [int(x) if x else 0 for x in params.split(";")] if params else []
+        n = values[0] if values and values[0] else 1
+
+        if command == "B":
+            self.y += n
+        elif command == "A":
+            self.y -= n
+        elif command == "C":
+            self.x += n
+        elif command == "D":
+            self.x -= n
+        elif command == "G":
+            self.x = n - 1
+        elif command == "H":
+            self.y = n - 1
+            self.x = (values[1] if len(values) > 1 and values[1] else 1) - 1
+        elif command == "m":
+            self.style = self._style_id(f"\x1b[{params}m") if params not in ("", "0") else 0
+
+    def _style_id(self, sequence: str) -> int:
+        if sequence not in self._style_ids:
+            self._style_ids[sequence] = len(self._styles)
+            self._styles.append(sequence)
+        return self._style_ids[sequence]
+
+def _changed_runs(chars: List[str], attrs: array, shown_chars: List[Union[str, None]], shown_attrs: array, first: int, last: int) -> List[Tuple[int, int]]:
+    """
+    The (start, stop) ranges of the cells of a row between `first` and `last` that differ from what is shown. Runs separated by only a few unchanged cells are merged, since rewriting those cells is shorter than moving the cursor past them.
+    """
+    runs = []
+    start = None
+    gap = 0
+    for x in range(first, last):
+        if chars[x] != shown_chars[x] or attrs[x] != shown_attrs[x]:
+            if start is None:
+                start = x
+            gap = 0
+            stop = x + 1
+        elif start is not None:
+            gap += 1
+            if gap > _max_gap:
+                runs.append((start, stop))
+                start = None
+
+    if start is not None:
+        runs.append((start, stop))
+
+    return runs
+
+# Cursor movements and SGR sequences, the only control sequences tiles produce
+_control = re.compile(r"\x1b\[([\d;]*)([A-DGHm])")
+
+# A cursor movement takes around this many bytes, so shorter gaps are rewritten instead
+_max_gap = 6
+
+# DECLRMM, the mode which enables setting left and right margins with DECSLRM
+_margin_mode = 69
+_probe_timeout = 0.25
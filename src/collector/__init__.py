@@ -0,0 +1 @@
+from .collector import *
\ No newline at end of file
@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import sched as sc
+import socket
+import struct
+import threading as th
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Tuple, Union
+
+import realtime as rt
+import realtime.remote as rm
+import tiles as ti
+
+class _channel():
+    """
+    A single task sampled by the collector on behalf of every viewer subscribed to it.
+    """
+    def __init__(self, func, args: Iterable[Any], kwargs: Mapping[str, Any], shape: Union[Tuple[int, ...], None]) -> None:
+        self.func = func
+        self.args = list(args)
+        self.kwargs = rt.resolve_sources(kwargs)
+        self.shape = shape
+        self.seq = 0
+
+        # The number of subscriptions asking for the channel at every frequency. The tasks of the collector's own configuration hold a subscription that is never released.
+        self.frequencies: Dict[float, int] = {}
+
+        # The (viewer, channel number used by the viewer) of every subscription mapped to the frequencies it asked for
+        self.viewers: Dict[Tuple["_viewer", int], FrozenSet[float]] = {}
+
+    def sample(self) -> Tuple[int, bytes]:
+        self.seq += 1
+        return rm.serialize(self.func(*self.args, **self.kwargs), self.shape)
+
+class _viewer():
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        # Only sends time out, the subscriptions of a viewer are read without a timeout
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, struct.pack("ll", int(_send_timeout), int(_send_timeout % 1 * 1e6)))
+        self.alive = True
+        self.subscriptions: List[Tuple[str, List[float]]] = []
+        self._lock = th.Lock()
+
+    def send(self, frame: bytes) -> None:
+        with self._lock:
+            try:
+                self.sock.sendall(frame)
+            except OSError as e:
+                logging.info(f"Dropping viewer after a failed send: {e}")
+                self.alive = False
+
+class collector():
+    """
+    Samples every task of a configuration once and publishes the results to any number of attached viewers over a Unix domain socket.
+
+    The tiles of the configuration are built without a terminal to find the tasks and timings to sample. Viewers subscribe to tasks by describing them, and tasks which are not part of the collector's own configuration are added on demand. Every sample is serialized once and the same payload is sent to every viewer subscribed to it, so the cost of sampling does not depend on the number of viewers. A channel is sampled at the frequencies of all of its subscriptions, but every viewer is only sent the samples taken at the frequencies it subscribed with, so its deltas and the size of its history are not affected by other viewers.
+
+    Args:
+
+        Conf:
+            The configuration whose tasks are sampled from the start
+        Path:
+            The path of the Unix domain socket viewers attach to
+    """
+    def __init__(self, conf: Mapping[str, Any], path: str) -> None:
+        self.path = path
+        self.sched = sc.scheduler()
+        self.channels: Dict[str, _channel] = {}
+        self._lock = th.Lock()
+        self._wake = th.Condition(self._lock)
+
+        ti.load_plugins(conf.get("plugins", []))
+        ti.tile.from_conf(conf["screen"])
+
+        for e in rt.executions():
+            self._procure(rm.describe(e.func, e.args, e.kwargs), e.shape, [a for x in e.instances for a, _, _ in x.timing()])
+
+    def serve(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        # Anyone who can connect can make the collector read procfs and sysfs, so only the owner may attach by default
+        os.chmod(self.path, _socket_mode)
+        server.listen()
+
+        logging.info(f"Collector listening on {self.path} with {len(self.channels)} tasks")
+        th.Thread(target=self._accept, args=(server,), name="observ-collector", daemon=True).start()
+
+        try:
+            self._sample()
+        finally:
+            server.close()
+            os.unlink(self.path)
+
+    def _procure(self, description: Mapping[str, Any], shape: Union[Tuple[int, ...], None], frequencies: Iterable[float]) -> Tuple[str, _channel]:
+        """
+        Finds or creates the channel for a described task and makes sure it is sampled at every given frequency until the subscription is released.
+        """
+        shape = tuple(shape) if shape is not None else None
+        key = json.dumps([description, shape], sort_keys=True)
+
+        with self._wake:
+            if key not in self.channels:
+                self.channels[key] = _channel(rm.locate(description), description["args"], description["kwargs"], shape)
+
+            channel = self.channels[key]
+            for f in frequencies:
+                if f not in channel.frequencies:
+                    channel.frequencies[f] = 0
+                    self.sched.add_items([(f, (key, f))])
+                channel.frequencies[f] += 1
+
+            # The sampling thread may be waiting for a later deadline than the new frequencies need
+            self._wake.notify()
+
+        return key, channel
+
+    def _release(self, viewer: _viewer) -> None:
+        """
+        Drops the subscriptions of a viewer. Frequencies nobody asks for anymore stop being sampled, and channels without any frequency are closed.
+        """
+        with self._lock:
+            for key, frequencies in viewer.subscriptions:
+                channel = self.channels[key]
+                channel.viewers = {k: v for k, v in channel.viewers.items() if k[0] is not viewer}
+
+                for f in frequencies:
+                    channel.frequencies[f] -= 1
+                    if not channel.frequencies[f]:
+                        del channel.frequencies[f]
+                        self.sched.remove_items([(key, f)])
+
+                if not channel.frequencies:
+                    del self.channels[key]
+
+            viewer.subscriptions.clear()
+
+    def _accept(self, server: socket.socket) -> None:
+        while 1:
+            sock, _ = server.accept()
+            th.Thread(target=self._subscribe, args=(sock,), name="observ-viewer", daemon=True).start()
+
+    def _subscribe(self, sock: socket.socket) -> None:
+        viewer = _viewer(sock)
+        logging.info("Viewer attached")
+
+        try:
+            for line in sock.makefile("rb"):
+                request = json.loads(line)
+                key, channel = self._procure(request, request["shape"], request["frequencies"])
+                with self._lock:
+                    channel.viewers[(viewer, request["channel"])] = frozenset(request["frequencies"])
+                    viewer.subscriptions.append((key, list(request["frequencies"])))
+        except BaseException as e:
+            logging.critical(f"Exception occurred while reading the subscriptions of a viewer:\n{e}")
+
+        viewer.alive = False
+        self._release(viewer)
+        logging.info("Viewer detached")
+
+    def _sample(self) -> None:
+        it = self.sched.next_timing()
+
+        while 1:
+            with self._wake:
+                # Subscriptions can add deadlines earlier than the one being waited for, so the earliest deadline is looked up again whenever the thread is woken up
+                dt = self.sched.peek()
+                while dt is None or dt > 0:
+                    self._wake.wait(dt)
+                    dt = self.sched.peek()
+
+                _, due = next(it)
+
+            frequencies: Dict[str, set] = {}
+            for key, f in due:
+                frequencies.setdefault(key, set()).add(f)
+
+            for key, due_frequencies in frequencies.items():
+                with self._lock:
+                    channel = self.channels.get(key)
+                    if channel is None:
+                        continue
+                    channel.viewers = {k: v for k, v in channel.viewers.items() if k[0].alive}
+                    viewers = [k for k, v in channel.viewers.items() if not v.isdisjoint(due_frequencies)]
+
+                if not viewers:
+                    continue
+
+                try:
+                    kind, payload = channel.sample()
+                except BaseException as e:
+                    logging.critical(f"Exception occurred in collected task with function {channel.func}:\n{e}")
+                    continue
+
+                for v, c in viewers:
+                    v.send(rm.encode(c, channel.seq, kind, payload))
+
+# A viewer which cannot take a frame within this many seconds is dropped rather than stalling every other viewer
+_send_timeout = 1.0
+
+_socket_mode = 0o600
@@ -1,43 +1,169 @@
 import argparse
+import asyncio
+import contextlib
 import json
 import logging
+import math
 import os
-import signal
+import sys
 from signal import SIGWINCH
-from typing import Any, Mapping
+from typing import Any, Iterable, Iterator, List, Mapping, Tuple
 
 import blessed as bl
 
+import canvas as cv
+import realtime as rt
 import tiles as ti
 import sched as sc
 
 class screen():
     def __init__(self, conf: Mapping[str, Any]) -> None:
         self.term = bl.Terminal()
+        self.canvas = cv.canvas(self.term)
 
+        if "pools" in conf:
+            rt.configure_pools(**conf["pools"])
+
+        ti.load_plugins(conf.get("plugins", []))
         self.root: ti.tile = ti.tile.from_conf(conf["screen"])
 
         self.sched = sc.scheduler(self.root.timing())
 
+        frames = conf.get("frames", {})
+        self.window = frames.get("window", _default_frame_window)
+        self.fps = frames.get("fps", _default_max_fps)
+        assert self.window >= 0, f"The frame window cannot be negative. The given window was {self.window}"
+        assert self.fps > 0, f"The frame rate has to be positive. The given frame rate was {self.fps}"
+
+        self._wake: asyncio.Event = None
+        self._resized = False
+        self._quit = False
+        self._events: List[ti.tile] = []
+
     def run(self) -> None:
         try:
             self.root.start_concurrent()
+            self.root.layout(self.canvas)
             with self.term.fullscreen(), self.term.cbreak(), self.term.hidden_cursor():
-                for time, tiles in self.sched.next_timing():
-
-                    inp = self.term.inkey(timeout=time)
-                    if inp in ["q", "Q"]:
-                        logging.info("Exit input recieved. Terminating...")
-                        return
-
-                    for tile in tiles:
-                        tile.render(self.term)
+                self.canvas.probe()
+                asyncio.run(self._run())
         except BaseException as e:
             import traceback; traceback.print_exc()
             import pdb; pdb.set_trace()
 
+    async def _run(self) -> None:
+        """
+        The main loop of the application.
+
+        Input and resizes are delivered by the event loop as soon as they happen and only set flags, so all drawing happens here and never reentrantly. Between two frames the loop sleeps until the next deadline or until it is woken up by input, a resize or an event.
+
+        Every tile which is due within the frame window of the first due tile is drawn in the same frame, and frames are never drawn more often than the frame rate allows. A tile whose deadline passes while the loop waits for the next allowed frame is drawn in that frame rather than in a frame of its own.
+        """
+        loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+
+        loop.add_reader(sys.stdin.fileno(), self._on_input)
+        loop.add_signal_handler(SIGWINCH, self._on_resize)
+        rt.on_event(lambda tiles: loop.call_soon_threadsafe(self._on_event, tiles))
+
+        timings = self.sched.next_timing()
+        deadline, due = self._next_due(timings, loop.time())
+        last_frame = -math.inf
+
+        try:
+            while 1:
+                while not self._quit:
+                    if self._resized:
+                        self._resized = False
+                        self.redraw()
+                        last_frame = loop.time()
+
+                    # Tiles whose execution sampled because of an event are drawn in the next allowed frame instead of at their next deadline
+                    start = max(loop.time() if self._events else deadline, last_frame + 1 / self.fps)
+                    if start <= loop.time():
+                        break
+
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), start - loop.time())
+                    except asyncio.TimeoutError:
+                        pass
+
+                if self._quit:
+                    logging.info("Exit input recieved. Terminating...")
+                    return
+
+                frame = dict.fromkeys(self._events)
+                self._events.clear()
+
+                while deadline <= loop.time() + self.window:
+                    frame.update(dict.fromkeys(due))
+                    deadline, due = self._next_due(timings, loop.time())
+
+                await self._sample(frame)
+
+                self.draw(frame)
+                last_frame = loop.time()
+        finally:
+            loop.remove_reader(sys.stdin.fileno())
+            loop.remove_signal_handler(SIGWINCH)
+
+    def _next_due(self, timings: Iterator[Tuple[float, List[ti.tile]]], now: float) -> Tuple[float, List[ti.tile]]:
+        """
+        The deadline on the clock of the event loop and the tiles of the next step of the scheduler. Without any timed tiles the deadline is never reached.
+        """
+        for dt, tiles in timings:
+            return now + dt, tiles
+        return math.inf, []
+
+    async def _sample(self, tiles: Iterable[ti.tile]) -> None:
+        """
+        Evaluates the functions of natively executed tiles on the default executor, so input keeps being handled while they run.
+        """
+        loop = asyncio.get_running_loop()
+        natives = {}
+        for t in tiles:
+            if isinstance(getattr(t, "module", None), rt.native_execution):
+                natives.setdefault(id(t.module), []).append(t)
+
+        if natives:
+            await asyncio.gather(*[loop.run_in_executor(None, ts[0].module.update, ts) for ts in natives.values()])
+
+    def _on_input(self) -> None:
+        inp = self.term.inkey(timeout=0)
+        while inp:
+            if inp in ["q", "Q"]:
+                self._quit = True
+                self._wake.set()
+            inp = self.term.inkey(timeout=0)
+
+    def _on_event(self, tiles: Iterable[ti.tile]) -> None:
+        self._events.extend(x for x in tiles if x not in self._events)
+        self._wake.set()
+
+    def _on_resize(self) -> None:
+        self._resized = True
+        self._wake.set()
+
+    def draw(self, tiles: Iterable[ti.tile]) -> None:
+        """
+        Renders the tiles into the canvas and writes the cells that changed to the terminal in one go. Every tile is clipped to its own region, so text which does not fit a tile cannot end up in one of its neighbours.
+        """
+        with contextlib.redirect_stdout(self.canvas):
+            for tile in tiles:
+                with self.canvas.clip(*tile.region):
+                    tile.render(self.canvas)
+
+        self.canvas.flush()
+
     def redraw(self) -> None:
-        self.root.redraw(self.term)
+        self.canvas.resize()
+        self.root.layout(self.canvas)
+
+        with contextlib.redirect_stdout(self.canvas):
+            self.root.redraw(self.canvas)
+
+        self.canvas.flush()
 
 def main(args: argparse.Namespace) -> None:
     """
@@ -50,20 +176,29 @@ def main(args: argparse.Namespace) -> None:
     config: dict
     scr: screen
 
-    def sig_resize(sig, action) -> None:
-        scr.redraw()
-
-    signal.signal(SIGWINCH, sig_resize)
-
     logging.info("Loading configuration file")
     with open(args.config) as fi:
         config = json.load(fi)
 
+    if args.collect:
+        import collector as co
+
+        logging.info("Starting collector")
+        co.collector(config, args.collect).serve()
+        return
+
+    if args.attach:
+        rt.attach(args.attach)
+
     logging.info("Creating screen layout")
     scr = screen(config)
 
     scr.run()
 
+# Tiles due within this many seconds of each other are drawn in the same frame
+_default_frame_window = 0.01
+
+_default_max_fps = 30
 
 if __name__ == "__main__":
 
@@ -109,6 +244,18 @@ if __name__ == "__main__":
         help="Opens a port and waits for a debugger to attach to the process using debugpy. If no additional argument is specified, the default port is 42069"
     )
 
+    parser.add_argument(
+        "--collect",
+        type=str,
+        help="Runs without a user interface and publishes the samples of every task in the configuration on a Unix domain socket at the given path."
+    )
+
+    parser.add_argument(
+        "--attach",
+        type=str,
+        help="Receives the samples for every tile from the collector listening on the Unix domain socket at the given path instead of sampling them."
+    )
+
     args = parser.parse_args()
 
     args.log_level = 0 if not args.log_level else args.log_level
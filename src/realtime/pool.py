@@ -0,0 +1,135 @@
+import atexit
+import concurrent.futures as cf
+import logging
+import os
+import sched as sc
+import signal
+import threading as th
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Tuple
+
+class task_stats():
+    """
+    Timing statistics for a single task running on a worker pool.
+
+    Runtime is the time spent inside the module function. Latency is the time between the task being due and the function starting, i.e. how long the task waited for a free worker.
+    """
+    def __init__(self) -> None:
+        self.runs = 0
+        self.busy = 0
+        self.last = 0.0
+        self.worst = 0.0
+        self.total = 0.0
+        self.latency = 0.0
+
+    def record(self, runtime: float, latency: float) -> None:
+        self.runs += 1
+        self.last = runtime
+        self.worst = max(self.worst, runtime)
+        self.total += runtime
+        self.latency += latency
+
+    @property
+    def mean(self) -> float:
+        return self.total / max(self.runs, 1)
+
+    @property
+    def mean_latency(self) -> float:
+        return self.latency / max(self.runs, 1)
+
+    def __str__(self) -> str:
+        return f"runs: {self.runs} | busy: {self.busy} | runtime (last/mean/worst): {self.last*1000:.2f}/{self.mean*1000:.2f}/{self.worst*1000:.2f} ms | mean latency: {self.mean_latency*1000:.2f} ms"
+
+class worker_pool():
+    """
+    A central timer which hands due tasks to a fixed number of workers.
+
+    A single timer thread keeps one scheduler for every pooled task, so a dashboard with dozens of tiles runs one timer and a handful of workers instead of one thread per tile. Threads and processes are kept in separate pools which are only created once a task needs them. The process pool is persistent, so the worker processes and any sources they have opened live for the lifetime of the application.
+
+    A task is any object with a `dispatch(identifiers)` method.
+    """
+    def __init__(self) -> None:
+        self.threads = min(_default_workers, os.cpu_count())
+        self.processes = min(_default_workers, os.cpu_count())
+
+        self.sched = sc.scheduler()
+        self._tasks: Dict[int, Any] = {}
+        self._executors: Dict[str, cf.Executor] = {}
+        self._lock = th.Lock()
+        self._wake = th.Condition(self._lock)
+        self._timer: th.Thread = None
+
+    def configure(self, threads: int = None, processes: int = None) -> None:
+        assert not self._executors, "Cannot resize the worker pools once they have been started."
+
+        self.threads = threads if threads else self.threads
+        self.processes = processes if processes else self.processes
+
+    def executor(self, kind: str) -> cf.Executor:
+        with self._lock:
+            if kind not in self._executors:
+                logging.info(f"Starting {kind} pool with {self.threads if kind == 'thread' else self.processes} workers")
+                if kind == "thread":
+                    self._executors[kind] = cf.ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="observ-worker")
+                elif kind == "process":
+                    self._executors[kind] = cf.ProcessPoolExecutor(max_workers=self.processes, initializer=_worker_init)
+                else:
+                    raise NotImplementedError
+
+            return self._executors[kind]
+
+    def add(self, task, timing: Iterable[Tuple[float, Any, str]]) -> None:
+        """
+        Schedules a task. Each (frequency, identifier, policy) tuple causes the task to be dispatched for that identifier at that frequency.
+        """
+        with self._lock:
+            self._tasks[id(task)] = task
+            self.sched.add_items([(f, (id(task), i), p) for f, i, p in timing])
+            self._wake.notify()
+
+            if self._timer is None:
+                self._timer = th.Thread(target=self._run, name="observ-timer", daemon=True)
+                self._timer.start()
+                atexit.register(self.report)
+
+    def missed(self, task) -> int:
+        return sum(v for (t, _), v in list(self.sched.missed.items()) if t == id(task))
+
+    def report(self) -> None:
+        for task in list(self._tasks.values()):
+            logging.info(f"Pooled task with function {task.func} | missed: {self.missed(task)} | {task.stats}")
+
+    def _run(self) -> None:
+        it = self.sched.next_timing()
+
+        while 1:
+            with self._wake:
+                # A task added while the timer waits can be due before the deadline it waits for, so the earliest deadline is looked up again whenever the timer is woken up
+                dt = self.sched.peek()
+                while dt is None or dt > 0:
+                    self._wake.wait(dt)
+                    dt = self.sched.peek()
+
+                _, due = next(it)
+
+            tasks = defaultdict(list)
+            for task, identifier in due:
+                tasks[task].append(identifier)
+
+            for task, identifiers in tasks.items():
+                try:
+                    self._tasks[task].dispatch(identifiers)
+                except RuntimeError:
+                    # The executors refuse new tasks once they have been shut down at exit, so there is nothing left to time
+                    logging.info("The worker pools have been shut down. Stopping the timer")
+                    return
+                except BaseException as e:
+                    logging.critical(f"Exception occurred while dispatching pooled task with function {self._tasks[task].func}:\n{e}")
+
+def _worker_init() -> None:
+    # Worker processes share the terminal with the UI, so they must not react to it being resized
+    signal.signal(signal.SIGWINCH, signal.SIG_DFL)
+
+_default_workers = 4
+
+pool = worker_pool()
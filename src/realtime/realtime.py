@@ -1,36 +1,132 @@
-import copy
+import atexit
+import functools
+import itertools
 import logging
-import multiprocessing as mp
+import math
 import os
 import queue as qu
 import sched as sc
+import select
+import signal
+import sources as so
+import storage as st
 import threading as th
 import time
-from typing import Any, Callable, Iterable, List, Mapping, NamedTuple, Type, Union
+from typing import Any, Callable, Iterable, List, Mapping, NamedTuple, Tuple, Type, Union
 
+# The worker pools, the collector client and the shared memory transport are only imported once an execution mode needs them, so they add nothing to the startup of configurations which do not use them
 
 class message(NamedTuple):
-    identifier: Any
+    sequence: int
     value: Any
 
-def _module_executor(func, sched, queue, *args, **kwargs) -> None:
+def _module_executor(func, sched, queue, *args, ring: "shared_ring" = None, **kwargs) -> None:
     logging.debug(f"Task recieved with function {func} with arguments {args} and keyword arguments {kwargs}")
 
-    if "files" in kwargs:
-        logging.info(f"Opening required files for task")
-        kwargs.update({"files": {x : open(x) for x in kwargs.pop('files')}})
-        logging.info(f"The following files were opened: {', '.join(kwargs['files'])}")
+    if th.current_thread() is th.main_thread():
+        # Only true when running in a separate process, which shares the terminal with the UI but must not react to it being resized
+        signal.signal(signal.SIGWINCH, signal.SIG_DFL)
+
+    kwargs = resolve_sources(kwargs)
 
     logging.debug(f"Starting scheduler for task with function {func} with arguments {args} and keyword arguments {kwargs}")
+    sequence = itertools.count()
+
+    def publish(result) -> None:
+        # Every sample is published once no matter how many tiles share the task. Numeric results go through shared memory and anything that does not fit goes through the queue
+        seq = next(sequence)
+        if ring is not None and ring.write(result):
+            return
+
+        queue.put(message(seq, result))
+
     try:
-        for t, identifier in sched.next_timing():
-            result = func(*args, **kwargs)
-            for e in identifier:
-                queue.put(message(e, result))
+        publish(func(*args, **kwargs))
+
+        missed = 0
+        for t, _ in sched.next_timing():
             time.sleep(t)
+            publish(func(*args, **kwargs))
+
+            if sum(sched.missed.values()) > missed:
+                missed = sum(sched.missed.values())
+                logging.debug(f"Task with function {func} has missed {missed} deadlines")
     except BaseException as e:
         logging.critical(f"Exception occurred in task with function {func} with arguments {args} and keyword arguments {kwargs}:\n{e}")
 
+def _event_executor(func, sched, queue, events, notify, *args, **kwargs) -> None:
+    """
+    Samples a function at its scheduled deadlines and, in between, as soon as one of the event files signals an event. Runs in a thread of the application.
+    """
+    kwargs = resolve_sources(kwargs)
+    sequence = itertools.count()
+
+    poller = select.poll()
+    fds = []
+    for path, trigger in events:
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        except OSError as e:
+            logging.warning(f"Cannot watch {path} for events, it will only be sampled periodically:\n{e}")
+            continue
+
+        try:
+            if trigger:
+                os.write(fd, trigger.encode() + b"\0")
+        except OSError as e:
+            logging.warning(f"Cannot register the trigger {trigger} on {path}, it will only be sampled periodically:\n{e}")
+            os.close(fd)
+            continue
+
+        poller.register(fd, select.POLLPRI)
+        fds.append(fd)
+
+    logging.info(f"Watching {len(fds)} event files for task with function {func}")
+
+    try:
+        queue.put(message(next(sequence), func(*args, **kwargs)))
+
+        for t, _ in sched.next_timing():
+            deadline = time.monotonic() + t
+
+            while (remaining := deadline - time.monotonic()) > 0:
+                ready = poller.poll(remaining * 1000)
+
+                for fd, flags in ready:
+                    if flags & (select.POLLERR | select.POLLNVAL):
+                        logging.warning(f"An event file of task with function {func} stopped signaling events")
+                        poller.unregister(fd)
+
+                if any(flags & select.POLLPRI for _, flags in ready):
+                    logging.debug(f"Event received for task with function {func}")
+                    queue.put(message(next(sequence), func(*args, **kwargs)))
+                    notify()
+
+            queue.put(message(next(sequence), func(*args, **kwargs)))
+    except BaseException as e:
+        logging.critical(f"Exception occurred in event task with function {func} with arguments {args} and keyword arguments {kwargs}:\n{e}")
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+def resolve_sources(kwargs: Mapping[str, Any]) -> Mapping[str, Any]:
+    """
+    Replaces the paths listed under `sources` with the shared sources for those paths in the current process.
+    """
+    if "sources" not in kwargs:
+        return kwargs
+
+    logging.debug(f"Attaching shared sources for task: {', '.join(kwargs['sources'])}")
+    return {**kwargs, "sources": so.resolve(kwargs["sources"])}
+
+def _pool_call(func, args, kwargs) -> Tuple[Any, float, float]:
+    """
+    Runs a module function on a pool worker. Returns the result along with when the function started and how long it ran for.
+    """
+    start = time.monotonic()
+    result = func(*args, **resolve_sources(kwargs))
+    return result, start, time.monotonic() - start
+
 class _tmp_exec():
     def __init__(self, executed, func, func_args, func_kwargs, *args, **kwargs) -> None:
         self.exec = executed
@@ -40,26 +136,30 @@ class _tmp_exec():
 
 class execution():
     """
+    Every sample is stored once per execution, no matter how many tiles share it. Each tile keeps a cursor with the number of samples it had seen when it last fetched, so `unread` tells it how many samples arrived since. Executions which store their results hand every tile a view of the samples since its cursor, starting with the last sample it has already seen, so tiles sharing an execution at different frequencies each compute their changes over their own interval. The stored history is grown to hold every sample published between two fetches of the slowest tile.
+
     Things to consider when using a `native` execution mode:
     - If the rendering of other tiles is slow, it may be because the system forces the evaluation of the function. Consider switching the execution method to `threaded` or `process`
     """
-    def __init__(self, func: Callable[..., Any], func_args: Iterable[Any], func_kwargs: Mapping[str, Any], instance, return_type: Union[Callable[[], None], Type], store_results: bool = False, initial: Any = None, *args, **kwargs) -> None:
+    def __init__(self, func: Callable[..., Any], func_args: Iterable[Any], func_kwargs: Mapping[str, Any], instance, return_type: Union[Callable[[], None], Type], store_results: bool = False, initial: Any = None, shape: Tuple[int, ...] = None, capacity: int = None, *args, **kwargs) -> None:
         self.func = func
         self.args = func_args
         self.kwargs = func_kwargs
+        self.shape = shape
+        self.store_results = store_results
 
-        self._base_storage = None
+        self.storage = None
         if store_results:
-            self._base_storage = []
-            if initial:
-                self._base_storage.append(initial)
+            self.storage = st.ring(capacity if capacity else _default_capacity, shape, [initial] if initial else [])
         elif initial:
-            self._base_storage = initial
+            self.storage = initial
         else:
-            self._base_storage = return_type()
+            self.storage = return_type()
 
+        self.seq = 0
+        self.count = 1 if store_results and initial else 0
         self.instances = []
-        self.mapping = {}
+        self.cursors = {}
 
         self.add_instance(instance)
 
@@ -68,13 +168,48 @@ class execution():
 
     def add_instance(self, o) -> None:
         self.instances.append(o)
-        self.mapping[id(o)] = copy.deepcopy(self._base_storage)
+        self.cursors[id(o)] = self.count
+
+        if self.store_results:
+            # Every instance causes samples at its own frequencies, so the slowest one sees this many samples published between two of its fetches
+            frequencies = [a for x in self.instances for a, _, _ in x.timing()]
+            self.storage.resize(max(self.storage.capacity, math.ceil(sum(frequencies) / min(frequencies)) + 1))
+
+    def publish(self, sequence: int, value: Any) -> None:
+        """
+        Stores a sample once for every instance sharing the execution.
+        """
+        if self.store_results:
+            self.storage.append(value)
+        else:
+            self.storage = value
+
+        self.seq = max(self.seq, sequence + 1)
+        self.count += 1
+
+    def unread(self, identifier) -> int:
+        """
+        The number of samples published since the identifier last fetched. Executions count the samples the next fetch will add as well, so a tile can tell whether its next fetch holds anything new.
+        """
+        return self.count - self.cursors[id(identifier)]
+
+    def _read(self, identifier) -> Any:
+        unread = self.unread(identifier)
+        self.cursors[id(identifier)] = self.count
+
+        # Without a new sample the tile is shown the change over its previous interval again
+        if self.store_results:
+            return self.storage.view(len(self.storage) - max(unread, 1) - 1)
+        return self.storage
 
     def start(self) -> None:
         return
 
     @staticmethod
     def procure(tile, executed: str = "native", *args, **kwargs) -> None:
+        if _remote is not None:
+            executed = "remote"
+
         for e in _existing_executions:
             if e == _tmp_exec(executed, *args, **kwargs):
                 logging.debug("Found a similar task. Grouping them together")
@@ -88,7 +223,7 @@ class execution():
 
     def __eq__(self, o: Union[object, _tmp_exec]) -> bool:
         if isinstance(o, _tmp_exec):
-            return self.func == o.func and self.args == o.args and self.kwargs == o.kwargs and type(self).__name__.split('_')[0] == o.exec
+            return self.func == o.func and self.args == o.args and self.kwargs == o.kwargs and type(self) == _execution_types.get(o.exec, execution)
         else:
             return self.func == o.func and self.args == o.args and self.kwargs == o.kwargs and type(self) == type(o)
 
@@ -99,21 +234,33 @@ class native_execution(execution):
     def __init__(self, *args, **kwargs) -> None:
         super(native_execution, self).__init__(*args, **kwargs)
         self.started = True
+        self._call_kwargs = resolve_sources(self.kwargs)
+        self._updated = set()
+
+    def update(self, identifiers: Iterable[Any]) -> None:
+        """
+        Evaluates the function once ahead of the next fetch of every given identifier, e.g. on an executor while the UI stays responsive.
+        """
+        self.publish(self.seq, self.func(*self.args, **self._call_kwargs))
+        self._updated.update(id(x) for x in identifiers)
 
     def fetch(self, identifier) -> Any:
-        value = self.func(*self.args, **self.kwargs)
+        if id(identifier) not in self._updated:
+            self.update([identifier])
+        self._updated.discard(id(identifier))
 
-        if "append" in dir(self._base_storage):
-            self.mapping[id(identifier)].append(value)
-        else:
-            self.mapping[id(identifier)] = value
+        return self._read(identifier)
 
-        return self.mapping[id(identifier)]
+    def unread(self, identifier) -> int:
+        # Unless the function was evaluated ahead of it, the next fetch evaluates it
+        return super(native_execution, self).unread(identifier) + (id(identifier) not in self._updated)
 
 class concurrent_execution(execution):
     def __init__(self, *args, **kwargs) -> None:
         self.started = False
-        self.remote: Union[th.Thread, mp.Process]
+        self.remote: Union[th.Thread, "mp.Process"]
+        self.ring: "shared_ring" = None
+        self._cursor = 0
 
         super(concurrent_execution, self).__init__(*args, **kwargs)
 
@@ -131,12 +278,18 @@ class concurrent_execution(execution):
             self.remote = th.Thread
             self.queue = qu.Queue()
         elif isinstance(self, process_execution):
+            import multiprocessing as mp
+            from .transport import shared_ring
+
             self.remote = mp.Process
             self.queue = mp.Queue()
+            if self.shape is not None:
+                self.ring = shared_ring(self.shape)
+                atexit.register(self.ring.close)
         else:
             raise NotImplementedError
 
-        self.kwargs.update({"func": self.func, "queue": self.queue, "sched": sc.scheduler([(a, id(b)) for x in self.instances for a, b in x.timing()])})
+        self.kwargs.update({"func": self.func, "queue": self.queue, "ring": self.ring, "sched": sc.scheduler([(a, id(b), c) for x in self.instances for a, b, c in x.timing()])})
 
         self.remote = self.remote(target=_module_executor, args=self.args, kwargs=self.kwargs, daemon=True)
 
@@ -145,20 +298,33 @@ class concurrent_execution(execution):
     def fetch(self, identifier) -> Any:
         assert self.started == True, "Cannot fetch data before the concurrent execution has started."
 
+        self._receive()
+        return self._read(identifier)
+
+    def unread(self, identifier) -> int:
+        self._receive()
+        return super(concurrent_execution, self).unread(identifier)
+
+    def _receive(self) -> None:
+        """
+        Publishes every sample the remote side delivered since the last call.
+        """
         try:
             while not self.queue.empty():
                 e: message = self.queue.get_nowait()
-                if "append" in dir(self._base_storage):
-                    self.mapping[e.identifier].append(e.value)
-                else:
-                    self.mapping[e.identifier] = e.value
+                self.publish(e.sequence, e.value)
 
-            return self.mapping[id(identifier)]
+            if self.ring is not None:
+                self._cursor, values = self.ring.read_since(self._cursor)
+                for i, v in enumerate(values, self._cursor - len(values)):
+                    self.publish(i, v)
         except BaseException as e:
             if isinstance(self, thread_execution):
                 logging.critical(f"Exception occured between threads with thread ids {th.main_thread().getName()} and {self.remote.getName()}:\n{e}")
             elif isinstance(self, process_execution):
                 logging.critical(f"Exception occured between processes with pids {os.getpid()} and {self.remote.pid}:\n{e}")
+            else:
+                logging.critical(f"Exception occured while fetching results of function {self.func}:\n{e}")
 
 class thread_execution(concurrent_execution):
     def __init__(self, *args, **kwargs) -> None:
@@ -168,10 +334,158 @@ class process_execution(concurrent_execution):
     def __init__(self, *args, **kwargs) -> None:
         super(process_execution, self).__init__(*args, **kwargs)
 
+class pooled_execution(concurrent_execution):
+    """
+    Runs the function on a shared worker pool instead of a dedicated thread or process.
+
+    The central timer of the pool dispatches the task whenever any of its instances is due. If the previous run has not finished by then, the run is skipped and counted as busy rather than queued up behind it.
+
+    The timing statistics of the task are kept up to date in `stats` while it runs, and `missed` counts the deadlines the timer could not keep, so both can be read at any time. The pool also writes them to the log at exit.
+    """
+    kind: str = None
+
+    def __init__(self, *args, **kwargs) -> None:
+        super(pooled_execution, self).__init__(*args, **kwargs)
+        from .pool import pool, task_stats
+
+        self.pool = pool
+        self.stats = task_stats()
+        self._future: "cf.Future" = None
+        self._sequence = itertools.count()
+
+    def start(self) -> None:
+        assert self.started == False, "Cannot start concurrent execution twice."
+        self.started = True
+
+        logging.info(f"Starting pooled execution of function {self.func} with arguments {self.args} and keyword arguments {self.kwargs} on the {self.kind} pool")
+
+        self.queue = qu.Queue()
+        self.dispatch([id(x) for x in self.instances])
+        self.pool.add(self, [(a, id(b), c) for x in self.instances for a, b, c in x.timing()])
+
+    def dispatch(self, identifiers: Iterable[int]) -> None:
+        if self._future is not None and not self._future.done():
+            self.stats.busy += 1
+            return
+
+        # The due time is bound to the run, as the next dispatch can happen after the run finished but before its callback ran
+        due = time.monotonic()
+        self._future = self.pool.executor(self.kind).submit(_pool_call, self.func, self.args, self.kwargs)
+        self._future.add_done_callback(functools.partial(self._complete, due))
+
+    @property
+    def missed(self) -> int:
+        return self.pool.missed(self)
+
+    def _complete(self, due: float, future: "cf.Future") -> None:
+        try:
+            result, started, runtime = future.result()
+        except BaseException as e:
+            logging.critical(f"Exception occurred in pooled task with function {self.func} with arguments {self.args} and keyword arguments {self.kwargs}:\n{e}")
+            return
+
+        self.stats.record(runtime, started - due)
+        self.queue.put(message(next(self._sequence), result))
+
+class thread_pool_execution(pooled_execution):
+    kind = "thread"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super(thread_pool_execution, self).__init__(*args, **kwargs)
+
+class process_pool_execution(pooled_execution):
+    kind = "process"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super(process_pool_execution, self).__init__(*args, **kwargs)
+
+class event_execution(concurrent_execution):
+    """
+    Evaluates the function in a thread at the frequency of its tiles and additionally as soon as one of its event files signals an event, such as a pressure stall trigger firing. Tiles sharing the execution are handed to the functions registered with `on_event` right after such a sample, so they can be drawn without waiting for their next deadline.
+
+    Args:
+
+        Events:
+            An iterable of (path, trigger) tuples. Every path is opened and, if given, the trigger is written to it. The file signals an event by becoming ready with POLLPRI.
+    """
+    def __init__(self, *args, events: Iterable[Tuple[str, str]] = None, **kwargs) -> None:
+        self.events = list(events) if events else []
+        super(event_execution, self).__init__(*args, **kwargs)
+
+    def start(self) -> None:
+        assert self.started == False, "Cannot start concurrent execution twice."
+        self.started = True
+
+        logging.info(f"Starting event driven execution of function {self.func} with arguments {self.args} and keyword arguments {self.kwargs}")
+
+        self.queue = qu.Queue()
+        sched = sc.scheduler([(a, id(b), c) for x in self.instances for a, b, c in x.timing()])
+
+        self.remote = th.Thread(target=_event_executor, args=(self.func, sched, self.queue, self.events, self._notify, *self.args), kwargs=self.kwargs, name="observ-events", daemon=True)
+        self.remote.start()
+
+    def _notify(self) -> None:
+        for callback in _event_listeners:
+            callback(self.instances)
+
+class remote_execution(concurrent_execution):
+    """
+    Receives the samples of the function from a collector instead of evaluating it. Used for every tile once the application has attached to a collector.
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        super(remote_execution, self).__init__(*args, **kwargs)
+
+    def start(self) -> None:
+        assert self.started == False, "Cannot start concurrent execution twice."
+        self.started = True
+
+        self.queue = qu.Queue()
+        _remote.subscribe(self, [a for x in self.instances for a, _, _ in x.timing()])
+
+    def receive(self, sequence: int, value: Any) -> None:
+        self.queue.put(message(sequence, value))
+
+def on_event(callback: Callable[[List[Any]], None]) -> None:
+    """
+    Registers a function which is called with the tiles of an event driven execution whenever an event caused it to take a sample. The function is called from the thread of the execution.
+    """
+    _event_listeners.append(callback)
+
+def executions() -> List[execution]:
+    return list(_existing_executions)
+
+def attach(path: str) -> None:
+    """
+    Makes every execution created from here on receive its samples from the collector listening on the given socket.
+    """
+    from .remote import remote_client
+
+    global _remote
+    logging.info(f"Attaching to collector at {path}")
+    _remote = remote_client(path)
+
+def configure_pools(threads: int = None, processes: int = None) -> None:
+    """
+    Sets the number of workers of the pools used by the `thread pool` and `process pool` execution modes.
+    """
+    from .pool import pool
+    pool.configure(threads, processes)
+
 _execution_types: Mapping[str, execution] = {
     "native": native_execution,
     "thread": thread_execution,
     "process": process_execution,
+    "thread pool": thread_pool_execution,
+    "process pool": process_pool_execution,
+    "event": event_execution,
+    "remote": remote_execution,
 }
 
 _existing_executions: List[execution] = []
+
+_event_listeners: List[Callable[[List[Any]], None]] = []
+
+_remote: "remote_client" = None
+
+# The number of samples kept for tiles that store their results but do not state how many they need
+_default_capacity = 2
@@ -0,0 +1,119 @@
+import importlib
+import json
+import logging
+import math
+import os
+import socket
+import sources as so
+import storage as st
+import struct
+import threading as th
+from array import array
+from typing import Any, Callable, Dict, Iterable, Mapping, Tuple, Union
+
+class remote_client():
+    """
+    The viewer side of a connection to a collector.
+
+    Every remote execution subscribes once with a channel number local to this client. The collector answers with a stream of frames for those channels, which a reader thread decodes and hands to the `receive` method of the matching execution.
+
+    Args:
+
+        Path:
+            The path of the collector's Unix domain socket
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+
+        self._channels: Dict[int, Any] = {}
+        self._lock = th.Lock()
+        self._reader = th.Thread(target=self._read, name="observ-remote", daemon=True)
+        self._reader.start()
+
+    def subscribe(self, execution, frequencies: Iterable[float]) -> None:
+        with self._lock:
+            channel = len(self._channels)
+            self._channels[channel] = execution
+
+            request = {"channel": channel, "frequencies": list(frequencies), "shape": execution.shape, **describe(execution.func, execution.args, execution.kwargs)}
+            logging.info(f"Subscribing to {request['module']}.{request['function']} on collector {self.path}")
+            self.sock.sendall(json.dumps(request).encode() + b"\n")
+
+    def _read(self) -> None:
+        stream = self.sock.makefile("rb")
+        try:
+            while 1:
+                header = stream.read(_frame.size)
+                if len(header) < _frame.size:
+                    break
+
+                channel, seq, kind, length = _frame.unpack(header)
+                payload = stream.read(length)
+
+                execution = self._channels.get(channel)
+                if execution is not None:
+                    execution.receive(seq, decode(kind, payload, execution.shape))
+        except BaseException as e:
+            logging.critical(f"Exception occurred while reading from collector {self.path}:\n{e}")
+
+        logging.critical(f"Lost the connection to collector {self.path}")
+
+def describe(func: Callable[..., Any], args: Iterable[Any], kwargs: Mapping[str, Any]) -> Mapping[str, Any]:
+    """
+    A description of a task which can be sent to a collector as JSON.
+    """
+    return {"module": func.__module__, "function": func.__qualname__, "args": list(args), "kwargs": dict(kwargs)}
+
+def locate(description: Mapping[str, Any]) -> Callable[..., Any]:
+    """
+    Finds the function of a described task. Only the functions of the `modules` package and the time functions used by the clock tiles can be located, and they can only be given the sources the modules read, so a viewer can neither make a collector run arbitrary code nor read arbitrary files.
+    """
+    module, function = description["module"], description["function"]
+    assert module.split(".")[0] == "modules" or (module, function) in _allowed_functions, f"{module}.{function} cannot be run by a collector"
+
+    for path in description["kwargs"].get("sources", []):
+        # Only the exact paths the modules read are accepted, normalised so `..` cannot reach other files
+        # The path is not resolved with realpath, as /proc/net is a symbolic link into /proc/self
+        assert os.path.normpath(path) == path and so.known(path), f"{path} cannot be read by a collector"
+
+    return getattr(importlib.import_module(module), function)
+
+def encode(channel: int, seq: int, kind: int, payload: bytes) -> bytes:
+    return _frame.pack(channel, seq % 2**32, kind, len(payload)) + payload
+
+def serialize(value: Any, shape: Union[Tuple[int, ...], None]) -> Tuple[int, bytes]:
+    """
+    Turns a sample into the kind and payload of a frame. Samples matching the declared shape are sent as packed doubles, anything else as JSON.
+    """
+    if shape is not None:
+        flat = st.flatten(value)
+        if flat is not None and len(flat) == math.prod(shape):
+            return _numeric, flat.tobytes()
+
+    return _json, json.dumps(value, default=_jsonable).encode()
+
+def _jsonable(value: Any) -> Any:
+    """
+    Packed arrays, including NumPy arrays, are sent as lists.
+    """
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} cannot be sent to a viewer")
+
+def decode(kind: int, payload: bytes, shape: Union[Tuple[int, ...], None]) -> Any:
+    if kind == _numeric:
+        flat = array("d")
+        flat.frombytes(payload)
+        return st.unflatten(flat.tolist(), tuple(shape))
+
+    return json.loads(payload)
+
+# channel, sequence number, kind, payload length
+_frame = struct.Struct("<HIBI")
+
+_numeric = 0
+_json = 1
+
+_allowed_functions = [("time", "time"), ("time", "ctime")]
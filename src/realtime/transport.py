@@ -0,0 +1,85 @@
+import math
+from multiprocessing import shared_memory
+from typing import Any, List, Tuple
+
+import storage as st
+
+class shared_ring():
+    """
+    A fixed-layout ring buffer of numeric samples living in shared memory.
+
+    The buffer starts with an 8 byte sequence counter followed by `slots` slots of `prod(shape)` doubles. A single producer writes each sample into the slot after the last published one and then increments the counter, so a consumer can copy out any sample newer than its own cursor without pickling or locking. A consumer only trusts a slot if the counter shows that the producer has not wrapped around to it while it was being copied.
+
+    Args:
+
+        Shape:
+            The shape of a single sample. `()` is a single number, `(n,)` a tuple of `n` numbers, and `(n, m)` a list of `n` tuples of `m` numbers.
+        Slots:
+            The number of samples the buffer can hold before the oldest one is overwritten
+        Name:
+            The name of an existing buffer to attach to. If not given a new buffer is created.
+    """
+    def __init__(self, shape: Tuple[int, ...], slots: int = None, name: str = None) -> None:
+        self.shape = tuple(shape)
+        self.width = math.prod(self.shape)
+        self.slots = slots if slots else _default_slots
+        self.owner = name is None
+
+        size = _header_size + 8 * self.width * self.slots
+
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self._seq = self.shm.buf[:_header_size].cast("Q")
+        self._data = self.shm.buf[_header_size:size].cast("d")
+
+        if self.owner:
+            self._seq[0] = 0
+
+    def write(self, value: Any) -> bool:
+        """
+        Publishes a sample. Returns False if the value does not fit the layout of the buffer, in which case nothing is written.
+        """
+        flat = st.flatten(value)
+        if flat is None or len(flat) != self.width:
+            return False
+
+        seq = self._seq[0]
+        start = (seq % self.slots) * self.width
+        self._data[start:start+self.width] = flat
+        self._seq[0] = seq + 1
+
+        return True
+
+    def read_since(self, cursor: int) -> Tuple[int, List[Any]]:
+        """
+        Returns the new cursor and every sample published after the given cursor that is still held by the buffer.
+        """
+        seq = self._seq[0]
+        first = max(cursor, seq - self.slots + 1)
+
+        values = []
+        for s in range(first, seq):
+            start = (s % self.slots) * self.width
+            values.append(self._data[start:start+self.width].tolist())
+
+        # Anything the producer may have started overwriting while the values were copied is dropped
+        overwritten = self._seq[0] - self.slots + 1 - first
+        if overwritten > 0:
+            values = values[overwritten:]
+
+        return seq, [st.unflatten(x, self.shape) for x in values]
+
+    def close(self) -> None:
+        self._seq.release()
+        self._data.release()
+        self.shm.close()
+
+        if self.owner:
+            self.shm.unlink()
+
+    def __reduce__(self):
+        return (shared_ring, (self.shape, self.slots, self.shm.name))
+
+# The sequence counter is padded to a full word so the samples stay aligned
+_header_size = 8
+
+_default_slots = 64
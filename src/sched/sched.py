@@ -1,63 +1,172 @@
-from typing import Any, Iterable, Mapping, Tuple
+import heapq
+import math
+import time
 from collections import defaultdict
+from itertools import count
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+class _entry():
+    """
+    A single pending deadline in the scheduler's heap.
+
+    The deadline is always derived as `anchor + n * period` rather than accumulated, so it never drifts no matter how many periods have passed. Entries are never removed from the heap directly. Instead they are flagged as dead and discarded lazily once they reach the top of the heap.
+    """
+    __slots__ = ("deadline", "seq", "anchor", "n", "period", "policy", "item", "alive")
+
+    def __init__(self, anchor: float, seq: int, period: float, policy: str, item: Any) -> None:
+        self.anchor = anchor
+        self.n = 1
+        self.deadline = anchor + period
+        self.seq = seq
+        self.period = period
+        self.policy = policy
+        self.item = item
+        self.alive = True
+
+    def __lt__(self, o) -> bool:
+        return (self.deadline, self.seq) < (o.deadline, o.seq)
 
 class scheduler():
-    def __init__(self, timing: Iterable[Tuple[int, Any]]) -> None:
-        self._base_periods = defaultdict(list)
-        self.add_items(timing)
+    """
+    A scheduler which keeps a priority queue of absolute deadlines on a monotonic clock.
+
+    Every item is scheduled with its own period (the inverse of its frequency) so any positive float frequency is accepted. Each step pops every item sharing the earliest deadline and reinserts it at its next deadline, which makes both operations O(log n) in the number of items. Items can be added and removed at any point, even while `next_timing` is being iterated.
+
+    The yielded delay is measured against the clock when it is yielded, so sleeping for it lands on the deadline regardless of how long the caller spent handling the previous step. When the caller falls behind by more than a period, the item's overrun policy decides what happens to the deadlines it missed:
+        skip:       The missed deadlines are dropped and the item keeps its original phase.
+        coalesce:   The missed deadlines are folded into a single late step and the item is re-anchored to the current time.
+        catch up:   Every missed deadline is yielded back-to-back until the item is on time again.
+
+    Args:
+
+        Timing:
+            An iterable of (frequency, item) or (frequency, item, policy) tuples describing how often each item should be yielded.
+        Clock:
+            The function providing the current time in seconds. Defaults to `time.monotonic`.
+    """
+    def __init__(self, timing: Iterable[Tuple[float, Any]] = (), clock: Callable[[], float] = time.monotonic) -> None:
+        self._heap: List[_entry] = []
+        self._entries: Dict[Any, List[_entry]] = {}
+        self._seq = count()
+
+        self.clock = clock
+        self.origin = None
+        self.missed: Dict[Any, int] = defaultdict(int)
 
-        self.total = 0.0
         self.t = 0.0
         self.dt = 0.0
 
+        self.add_items(timing)
+
     def next_timing(self):
+        """
+        Yields the time left until the next deadline together with the items that are due at that deadline.
+        """
+        if self.origin is None:
+            self.origin = self.clock()
+
         while 1:
-            self.t %= max(self.timings)
-            self.t += self.dt
-            try:
-                self.dt = min([x - self.t for x in self.timings if x > self.t])
-            except ValueError:
-                self.dt = min(self.timings)
-
-            self.total += self.dt
-            yield self.dt, self.timings.get(self.t, self.timings[max(self.timings)])
-
-    def add_items(self, timing: Iterable[Tuple[int, Any]]):
-        for t, v in timing:
-            self._base_periods[t].append(v)
-        period = self._find_period(self._base_periods)
-        steps = [{i/k : v for i in range(1, int(period * k)+1)} for k, v in timing]
-        self.timings = {x:[d[x] for d in steps if x in d] for x in dict.fromkeys(sorted([b for a in steps for b in a]))}
-
-    def _factorize(self, val: int) -> Mapping[int, int]:
-        factors = defaultdict(int)
-        while val > 1:
-            for i in range(2, val+1):
-                if val % i == 0:
-                    factors[i] += 1
-                    val //= i
-                    break
-        return factors
-
-    def _lcm(self, vals: Iterable[int]) -> int:
-        lcm = 1
-        factors = [self._factorize(round(x)) for x in vals]
-        lcm_factors = {k: max([d.get(k, 0) for d in factors]) for k in dict.fromkeys([y for x in factors for y in x.keys()]).keys()}
-        [lcm := lcm * k ** v for k,v in lcm_factors.items()]
-        return lcm
-
-    def _gcd(self, vals: Iterable[int]) -> int:
-        gcd = 1
-        factors = [self._factorize(round(x)) for x in vals]
-        gcd_factors = {k: min([d.get(k, 0) for d in factors]) for k in dict.fromkeys([y for x in factors for y in x.keys()]).keys()}
-        [gcd := gcd * k ** v for k,v in gcd_factors.items()]
-        return gcd
-
-    def _find_period(self, vals: Iterable[int]) -> float:
-        return 1/self._gcd(vals)
+            due = self._pop_due()
+            if not due:
+                return
+
+            self.t = due[0].deadline
+            now = self.now()
+
+            for e in due:
+                self._reschedule(e, now)
+
+            self.dt = max(0.0, self.t - self.now())
+
+            yield self.dt, [e.item for e in due]
+
+    def peek(self) -> Union[float, None]:
+        """
+        The time left until the earliest deadline without yielding the items due at it, or None if nothing is scheduled. Starts the clock of the scheduler if `next_timing` has not done so yet.
+        """
+        if self.origin is None:
+            self.origin = self.clock()
+
+        while self._heap and not self._heap[0].alive:
+            heapq.heappop(self._heap)
+
+        return max(0.0, self._heap[0].deadline - self.now()) if self._heap else None
+
+    def now(self) -> float:
+        """
+        The current time relative to when the scheduler was started.
+        """
+        return 0.0 if self.origin is None else self.clock() - self.origin
+
+    def add_items(self, timing: Iterable[Tuple[float, Any]]) -> None:
+        anchor = self.now()
+
+        for frequency, item, *policy in timing:
+            assert frequency > 0, f"Frequencies have to be positive. The given frequency was {frequency}"
+            policy = policy[0] if policy and policy[0] else "skip"
+            assert policy in _overrun_policies, f"Unknown overrun policy {policy}. Expected one of: {', '.join(_overrun_policies)}"
+
+            e = _entry(anchor, next(self._seq), 1 / frequency, policy, item)
+            self._entries.setdefault(item, []).append(e)
+            heapq.heappush(self._heap, e)
+
+    def items(self) -> List[Any]:
+        return list(self._entries)
+
+    def remove_items(self, items: Iterable[Any]) -> None:
+        for item in items:
+            for e in self._entries.pop(item, []):
+                e.alive = False
+            self.missed.pop(item, None)
+
+    def _reschedule(self, e: _entry, now: float) -> None:
+        """
+        Moves an entry which is being yielded to its next deadline according to its overrun policy.
+        """
+        e.n += 1
+        behind = math.ceil((now - e.anchor) / e.period) - e.n
+
+        if behind > 0:
+            if e.policy == "skip":
+                e.n += behind
+            elif e.policy == "coalesce":
+                e.anchor = now
+                e.n = 1
+            self.missed[e.item] += behind if e.policy != "catch up" else 1
+
+        e.deadline = e.anchor + e.n * e.period
+        e.seq = next(self._seq)
+        heapq.heappush(self._heap, e)
+
+    def _pop_due(self) -> List[_entry]:
+        """
+        Removes every live entry that shares the earliest deadline from the heap.
+        """
+        while self._heap and not self._heap[0].alive:
+            heapq.heappop(self._heap)
+
+        if not self._heap:
+            return []
+
+        deadline = self._heap[0].deadline
+        due = []
+        while self._heap and self._heap[0].deadline - deadline <= _epsilon:
+            e = heapq.heappop(self._heap)
+            if e.alive:
+                due.append(e)
+
+        return due
+
+    def __len__(self) -> int:
+        return sum(len(x) for x in self._entries.values())
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self._entries
 
     def __iter__(self):
         return self.next_timing()
 
-    def __next__(self):
-        return self.next_timing()
\ No newline at end of file
+# Deadlines closer together than this are treated as a single instant
+_epsilon = 1e-9
+
+_overrun_policies = ["skip", "coalesce", "catch up"]
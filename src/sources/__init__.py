@@ -0,0 +1 @@
+from .sources import *
\ No newline at end of file
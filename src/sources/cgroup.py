@@ -0,0 +1,252 @@
+import ctypes
+import logging
+import math
+import os
+import threading as th
+import time
+from typing import Any, Callable, Dict, FrozenSet, List, Tuple, Union
+
+from .sources import _default_ttl
+
+class _cgroup():
+    """
+    The open statistics files and last counters of a single cgroup.
+    """
+    __slots__ = ("name", "fds", "usage", "io")
+
+    def __init__(self, name: str, path: str) -> None:
+        self.name = name
+        self.fds: Dict[str, int] = {}
+        self.usage: int = None
+        self.io: int = None
+
+        for x in _cgroup_files:
+            try:
+                self.fds[x] = os.open(f"{path}/{x}", os.O_RDONLY)
+            except OSError:
+                continue
+
+    def read(self, name: str) -> Union[bytes, None]:
+        fd = self.fds.get(name)
+        if fd is None:
+            return None
+
+        try:
+            return os.pread(fd, _cgroup_read_size, 0)
+        except OSError:
+            return None
+
+    def close(self) -> None:
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds.clear()
+
+class _watcher():
+    """
+    Watches directories for entries being created or removed through inotify, which is called through ctypes as the standard library does not wrap it.
+    """
+    def __init__(self) -> None:
+        self.fd: int = None
+
+        try:
+            self._libc = ctypes.CDLL(None, use_errno=True)
+            fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            logging.info(f"inotify is not available, so the cgroup hierarchy is walked periodically: {e}")
+            return
+
+        if fd < 0:
+            logging.info(f"Could not create an inotify instance, so the cgroup hierarchy is walked periodically: {os.strerror(ctypes.get_errno())}")
+            return
+        self.fd = fd
+
+    def watch(self, path: str) -> bool:
+        """
+        Starts watching a directory, returning whether it is watched. Watching a directory again keeps the existing watch, and the watch of a removed directory is dropped by the kernel.
+        """
+        if self.fd is None:
+            return False
+        return self._libc.inotify_add_watch(self.fd, os.fsencode(path), _IN_CREATE | _IN_DELETE | _IN_ONLYDIR) >= 0
+
+    def changed(self) -> bool:
+        """
+        Whether any directory changed since the last call. The pending events are consumed, their content does not matter as any change leads to a new walk.
+        """
+        if self.fd is None:
+            return False
+
+        changed = False
+        while 1:
+            try:
+                changed |= bool(os.read(self.fd, _inotify_read_size))
+            except BlockingIOError:
+                return changed
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+class cgroup_table():
+    """
+    A shared table of the leaf cgroups of the cgroup v2 hierarchy, which on container hosts are the containers.
+
+    The hierarchy is walked once and the statistics files of every cgroup are kept open. The cgroup filesystem does not update the modification time of a directory when cgroups are created or removed in it, so every directory of the hierarchy, leaves included, is watched with inotify instead, and the hierarchy is only walked again once a cgroup was created or removed. A sample therefore only costs a single read which finds no events. Without inotify, or once the limit of watches is reached, the hierarchy is walked again every `_cgroup_rescan` seconds instead. CPU usage and I/O throughput are computed from the change of their counters since the previous sample.
+
+    Args:
+
+        Ttl:
+            The number of seconds a sample is considered fresh
+    """
+    def __init__(self, ttl: float = None) -> None:
+        self.ttl = ttl if ttl is not None else _default_ttl
+        self.root = next((x for x in _cgroup_roots if os.path.exists(f"{x}/cgroup.controllers")), None)
+
+        self._groups: Dict[str, _cgroup] = {}
+        self._watcher = _watcher()
+        self._watched = False
+        self._walked = -math.inf
+        self._lock = th.Lock()
+        self._stamp = -math.inf
+        self._sampled = -math.inf
+        self._value: List[Tuple[str, float, int, float, float]] = []
+
+        if self.root is None:
+            logging.info("No cgroup v2 hierarchy found")
+
+    def read(self) -> List[Tuple[str, float, int, float, float]]:
+        """
+        Returns a (name, cpu %, memory in kB, memory pressure, I/O bytes per second) tuple for every leaf cgroup. The memory pressure is the percentage of the last ten seconds in which some task of the cgroup was stalled on memory.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._stamp > self.ttl:
+                self._value = self._sample(now)
+                self._stamp = now
+
+            return self._value
+
+    def _sample(self, now: float) -> List[Tuple[str, float, int, float, float]]:
+        if self.root is None:
+            return []
+
+        if self._changed(now):
+            self._walk(now)
+
+        elapsed = now - self._sampled
+        self._sampled = now
+
+        out = []
+        for group in self._groups.values():
+            usage = _parse_keyed(group.read("cpu.stat"), b"usage_usec")
+            memory = _parse_int(group.read("memory.current"))
+            pressure = _parse_keyed(group.read("memory.pressure"), b"avg10", float)
+            io = _parse_io_stat(group.read("io.stat"))
+
+            cpu = (usage - group.usage) / (elapsed * 1e6) * 100 if None not in (usage, group.usage) else 0.0
+            throughput = (io - group.io) / elapsed if None not in (io, group.io) else 0.0
+            group.usage, group.io = usage, io
+
+            out.append((group.name, cpu, (memory or 0) // 1024, pressure or 0.0, throughput))
+
+        return out
+
+    def _changed(self, now: float) -> bool:
+        # Events are still read when not every directory is watched, so the ones that are watched are noticed right away
+        changed = self._watcher.changed()
+        return changed if self._watched else changed or now - self._walked > _cgroup_rescan
+
+    def _walk(self, now: float) -> None:
+        """
+        Walks the hierarchy, keeping the open files of cgroups that are still there and opening the files of new ones. Every directory is watched before it is listed, so a cgroup created during the walk is either found or leads to another walk.
+        """
+        leaves = []
+        watched = True
+
+        def _visit(path: str) -> None:
+            nonlocal watched
+            watched = self._watcher.watch(path) and watched
+            try:
+                names = _children(path)
+            except OSError:
+                return
+
+            if not names and path != self.root:
+                leaves.append(path)
+            for x in names:
+                _visit(f"{path}/{x}")
+
+        _visit(self.root)
+
+        groups = {}
+        for path in leaves:
+            name = os.path.relpath(path, self.root)
+            groups[name] = self._groups.pop(name, None) or _cgroup(name, path)
+
+        for group in self._groups.values():
+            group.close()
+
+        logging.debug(f"Walked the cgroup hierarchy and found {len(groups)} leaf cgroups")
+        self._groups = groups
+        if self._watcher.fd is not None and not watched and (self._watched or self._walked == -math.inf):
+            logging.warning(f"Could not watch every cgroup directory, so the cgroup hierarchy is walked every {_cgroup_rescan} seconds: {os.strerror(ctypes.get_errno())}")
+        self._watched = watched
+        self._walked = now
+
+    def close(self) -> None:
+        for group in self._groups.values():
+            group.close()
+        self._groups.clear()
+        self._watcher.close()
+
+def _children(path: str) -> FrozenSet[str]:
+    """
+    The names of the child cgroups of a cgroup directory.
+    """
+    with os.scandir(path) as it:
+        return frozenset(x.name for x in it if x.is_dir(follow_symlinks=False))
+
+def _parse_keyed(data: Union[bytes, None], key: bytes, kind: Callable[[bytes], Any] = int) -> Any:
+    """
+    Parses the first value following `key` in a cgroup file of `key value` or `key=value` pairs.
+    """
+    if not data:
+        return None
+
+    start = data.find(key)
+    if start < 0:
+        return None
+
+    start += len(key) + 1
+    end = start
+    while end < len(data) and data[end] not in b" \n":
+        end += 1
+    return kind(data[start:end])
+
+def _parse_int(data: Union[bytes, None]) -> Union[int, None]:
+    return int(data) if data else None
+
+def _parse_io_stat(data: Union[bytes, None]) -> Union[int, None]:
+    """
+    The bytes read and written by a cgroup across all devices.
+    """
+    if data is None:
+        return None
+
+    return sum(int(x.split(b"=")[1]) for x in data.split() if x.startswith((b"rbytes=", b"wbytes=")))
+
+# The unified hierarchy is mounted on its own on systems which still use cgroup v1 for the controllers
+_cgroup_roots = ("/sys/fs/cgroup", "/sys/fs/cgroup/unified")
+
+_cgroup_files = ("cpu.stat", "memory.current", "memory.pressure", "io.stat")
+_cgroup_read_size = 4096
+
+# The number of seconds after which the hierarchy is walked again when its directories cannot be watched
+_cgroup_rescan = 10
+
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_ONLYDIR = 0x1000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+_inotify_read_size = 65536
\ No newline at end of file
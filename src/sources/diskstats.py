@@ -0,0 +1,44 @@
+import os
+from array import array
+from typing import List, Tuple
+
+class _diskstats_parser():
+    """
+    Parses /proc/diskstats into the names of the whole disks and a packed array of unsigned integers with one row of the counters named in `disk_fields` per disk.
+
+    Partitions, loop devices and ram disks are left out. Which lines of the file belong to a disk and where their counters are among the tokens of the file is worked out once into a mask of token positions, so later reads only convert the tokens at those positions. The mask is rebuilt whenever the devices in the file change.
+    """
+    def __init__(self) -> None:
+        self._devices: List[bytes] = []
+        self._names: Tuple[str, ...] = ()
+        self._positions: List[int] = []
+        self._width = 0
+
+    def __call__(self, data: memoryview) -> Tuple[Tuple[str, ...], array]:
+        tokens = data.tobytes().split()
+
+        if not self._width or len(tokens) % self._width or tokens[2::self._width] != self._devices:
+            self._learn(tokens)
+
+        return self._names, array("Q", map(int, map(tokens.__getitem__, self._positions)))
+
+    def _learn(self, tokens: List[bytes]) -> None:
+        # Every line has the same number of fields, the device name of the next line follows the last counter of the previous one
+        self._width = next((i - 2 for i in range(3, len(tokens)) if not tokens[i].isdigit()), len(tokens))
+        self._devices = tokens[2::self._width]
+
+        disks = [i for i, x in enumerate(self._devices) if _is_disk(int(tokens[i*self._width]), x.decode())]
+
+        self._names = tuple(self._devices[i].decode() for i in disks)
+        self._positions = [i*self._width + f for i in disks for f in _disk_columns]
+
+def _is_disk(major: int, name: str) -> bool:
+    return major not in _virtual_majors and not os.path.exists(f"/sys/class/block/{name}/partition")
+
+# The column of every counter in `disk_fields` in a line of the file
+_disk_columns = (3, 5, 6, 7, 9, 10)
+
+# Ram disks and loop devices
+_virtual_majors = (1, 7)
+
+parser = _diskstats_parser()
\ No newline at end of file
@@ -0,0 +1,111 @@
+import concurrent.futures as cf
+import logging
+import math
+import os
+import threading as th
+import time
+from array import array
+from typing import Iterable, List, Tuple, Union
+
+from .sources import _default_ttl, _read_text, sensors
+
+class sensor_table():
+    """
+    A shared table of the temperature sensors exposed under /sys/class/hwmon.
+
+    The sensors are discovered once and the file of every sensor is kept open, so sampling them is a single `os.pread` per sensor. The hwmon directory is listed on every sample, which is cheap as it only holds one entry per device, and the sensors are only discovered again when the devices listed change or a sensor can no longer be read. The modification time of the directory cannot be used for this, as sysfs does not update it when devices come and go. The reads can optionally be spread over a few threads, each of which reads its share of the sensors in one batch.
+
+    Args:
+
+        Ttl:
+            The number of seconds a sample is considered fresh
+    """
+    def __init__(self, ttl: float = None) -> None:
+        self.ttl = ttl if ttl is not None else _default_ttl
+
+        self.names: Tuple[str, ...] = ()
+        self._fds: List[int] = []
+        self._devices: List[str] = None
+        self._lock = th.Lock()
+        self._stamp = -math.inf
+        self._value: Tuple[Tuple[str, ...], array] = ((), array("d"))
+        self._executor: cf.ThreadPoolExecutor = None
+
+    def read(self, threads: int = None) -> Tuple[Tuple[str, ...], array]:
+        """
+        Returns the names of the sensors and their temperatures in degrees Celsius. If `threads` is given the sensors are read by that many threads.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._stamp > self.ttl:
+                self._value = self._sample(threads)
+                self._stamp = now
+
+            return self._value
+
+    def _sample(self, threads: Union[int, None]) -> Tuple[Tuple[str, ...], array]:
+        try:
+            devices = sorted(os.listdir(sensors))
+        except OSError:
+            devices = []
+
+        if devices != self._devices:
+            self._devices = devices
+            self._discover()
+
+        if threads and threads > 1 and len(self._fds) > 1:
+            if self._executor is None:
+                self._executor = cf.ThreadPoolExecutor(max_workers=threads, thread_name_prefix="observ-sensors")
+
+            size = math.ceil(len(self._fds) / threads)
+            values = [x for batch in self._executor.map(_read_sensors, [self._fds[i:i+size] for i in range(0, len(self._fds), size)]) for x in batch]
+        else:
+            values = _read_sensors(self._fds)
+
+        if None in values:
+            # A sensor disappeared without its device going away, so the next sample discovers the sensors again
+            self._devices = None
+            values = [x if x is not None else math.nan for x in values]
+
+        return self.names, array("d", values)
+
+    def _discover(self) -> None:
+        self.close()
+
+        names, fds = [], []
+        try:
+            devices = sorted(os.scandir(sensors), key=lambda x: x.name)
+        except OSError:
+            devices = []
+
+        for device in devices:
+            chip = _read_text(f"{device.path}/name") or device.name
+            inputs = sorted((x.name for x in os.scandir(device.path) if x.name.startswith("temp") and x.name.endswith("_input")), key=lambda x: int(x[4:-6]) if x[4:-6].isdigit() else 0)
+
+            for x in inputs:
+                try:
+                    fds.append(os.open(f"{device.path}/{x}", os.O_RDONLY))
+                except OSError:
+                    continue
+                names.append(f"{chip} {_read_text(f'{device.path}/{x[:-6]}_label') or x[:-6]}")
+
+        logging.info(f"Discovered {len(fds)} temperature sensors")
+        self.names = tuple(names)
+        self._fds = fds
+
+    def close(self) -> None:
+        for fd in self._fds:
+            os.close(fd)
+        self._fds = []
+
+def _read_sensors(fds: Iterable[int]) -> List[Union[float, None]]:
+    """
+    Reads the temperature of every given sensor file in degrees Celsius. Sensors which cannot be read are None.
+    """
+    values = []
+    for fd in fds:
+        try:
+            values.append(int(os.pread(fd, 32, 0)) / 1000)
+        except (OSError, ValueError):
+            values.append(None)
+    return values
\ No newline at end of file
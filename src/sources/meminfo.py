@@ -0,0 +1,31 @@
+from typing import Dict, List
+
+class _meminfo_parser():
+    """
+    Parses /proc/meminfo into a map from field name to value. Sizes are in kB, fields without a unit such as `HugePages_Total` are plain counts.
+
+    The fields of /proc/meminfo keep their order and number of tokens between reads, so the names and the positions of the values among the tokens of the file are learned on the first read. Later reads only convert the tokens at those positions. The layout is learned again if the number of tokens changes.
+    """
+    def __init__(self) -> None:
+        self._names: List[str] = []
+        self._positions: List[int] = []
+        self._tokens = -1
+
+    def __call__(self, data: memoryview) -> Dict[str, int]:
+        tokens = data.tobytes().split()
+        if len(tokens) != self._tokens:
+            self._learn(tokens)
+
+        return dict(zip(self._names, map(int, (tokens[i] for i in self._positions))))
+
+    def _learn(self, tokens: List[bytes]) -> None:
+        self._names.clear()
+        self._positions.clear()
+        self._tokens = len(tokens)
+
+        for i, x in enumerate(tokens):
+            if x.endswith(b":"):
+                self._names.append(x[:-1].decode())
+                self._positions.append(i+1)
+
+parser = _meminfo_parser()
\ No newline at end of file
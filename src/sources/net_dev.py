@@ -0,0 +1,31 @@
+from array import array
+from typing import List, Tuple
+
+class _net_dev_parser():
+    """
+    Parses /proc/net/dev into the names of the network interfaces and a packed array of unsigned integers with one row of the counters named in `net_fields` per interface.
+
+    The positions of the counters among the tokens of the file are worked out once and only rebuilt when the interfaces in the file change, so later reads only convert the tokens at those positions.
+    """
+    def __init__(self) -> None:
+        self._interfaces: List[bytes] = []
+        self._names: Tuple[str, ...] = ()
+        self._positions: List[int] = []
+
+    def __call__(self, data: memoryview) -> Tuple[Tuple[str, ...], array]:
+        # The first two lines are headers. Large counters can run into the colon after the interface name, so it is treated as whitespace.
+        body = data.obj.find(b"\n", data.obj.find(b"\n", 0, len(data)) + 1, len(data)) + 1
+        tokens = data[body:].tobytes().replace(b":", b" ").split()
+
+        if tokens[::_net_width] != self._interfaces:
+            self._interfaces = tokens[::_net_width]
+            self._names = tuple(x.decode() for x in self._interfaces)
+            self._positions = [i*_net_width + f for i in range(len(self._interfaces)) for f in _net_columns]
+
+        return self._names, array("Q", map(int, map(tokens.__getitem__, self._positions)))
+
+# The column of every counter in `net_fields` and the number of columns of a line including the interface name
+_net_columns = (1, 2, 9, 10)
+_net_width = 17
+
+parser = _net_dev_parser()
\ No newline at end of file
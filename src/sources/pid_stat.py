@@ -0,0 +1,127 @@
+import math
+import os
+import resource
+import threading as th
+import time
+from typing import Any, Dict, List, Tuple, Union
+
+from .sources import _default_ttl
+
+class process_table():
+    """
+    A shared, incrementally updated table of every process in /proc.
+
+    Every process is scanned through its /proc/[pid]/stat file. The files of known processes are kept open and read with a single `os.pread` per scan, and a process is only parsed again if the bytes of its stat file changed since the last scan, which is rarely the case for the many idle processes of a busy host. The CPU usage of a process is computed from the change in its CPU time since the previous scan.
+
+    Like sources, the table is shared per process and only scanned again once the previous scan is older than `ttl` seconds.
+
+    Args:
+
+        Ttl:
+            The number of seconds a scan is considered fresh
+    """
+    def __init__(self, ttl: float = None) -> None:
+        self.ttl = ttl if ttl is not None else _default_ttl
+
+        self._fds: Dict[int, int] = {}
+        self._raw: Dict[int, bytes] = {}
+        self._rows: Dict[int, List[Any]] = {}
+        self._ticks: Dict[int, int] = {}
+        self._lock = th.Lock()
+        self._stamp = -math.inf
+        self._scanned = -math.inf
+        self._value: List[Tuple[int, str, float, int]] = []
+
+        # Keeping a file open for every process could exhaust the file descriptors of the application, so past this limit stat files are opened for every scan instead
+        self._max_fds = resource.getrlimit(resource.RLIMIT_NOFILE)[0] // 2
+
+    def read(self) -> List[Tuple[int, str, float, int]]:
+        """
+        Returns a (pid, name, cpu %, resident memory in kB) tuple for every process.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._stamp > self.ttl:
+                self._value = self._scan(now)
+                self._stamp = now
+
+            return self._value
+
+    def _scan(self, now: float) -> List[Tuple[int, str, float, int]]:
+        pids = {int(x.name) for x in os.scandir("/proc") if x.name.isdigit()}
+
+        for pid in [x for x in self._raw if x not in pids]:
+            self._forget(pid)
+
+        elapsed = (now - self._scanned) * _clock_ticks
+        self._scanned = now
+
+        out = []
+        for pid in pids:
+            data = self._read_stat(pid)
+            if data is None:
+                self._forget(pid)
+                continue
+
+            ticks = self._ticks.get(pid)
+            if data != self._raw.get(pid):
+                self._raw[pid] = data
+                self._rows[pid] = row = _parse_pid_stat(data)
+                self._ticks[pid] = row[2]
+            else:
+                row = self._rows[pid]
+
+            cpu = (row[2] - ticks) / elapsed * 100 if ticks is not None and elapsed > 0 else 0.0
+            out.append((pid, row[0], cpu, row[1]))
+
+        return out
+
+    def _read_stat(self, pid: int) -> Union[bytes, None]:
+        """
+        Reads the stat file of a process. Returns None if the process no longer exists.
+        """
+        try:
+            fd = self._fds.get(pid)
+            if fd is not None:
+                return os.pread(fd, _pid_stat_size, 0)
+
+            fd = os.open(f"/proc/{pid}/stat", os.O_RDONLY)
+            if len(self._fds) < self._max_fds:
+                self._fds[pid] = fd
+                return os.pread(fd, _pid_stat_size, 0)
+
+            try:
+                return os.pread(fd, _pid_stat_size, 0)
+            finally:
+                os.close(fd)
+        except OSError:
+            return None
+
+    def _forget(self, pid: int) -> None:
+        fd = self._fds.pop(pid, None)
+        if fd is not None:
+            os.close(fd)
+
+        self._raw.pop(pid, None)
+        self._rows.pop(pid, None)
+        self._ticks.pop(pid, None)
+
+    def close(self) -> None:
+        for pid in list(self._fds):
+            self._forget(pid)
+
+def _parse_pid_stat(data: bytes) -> List[Any]:
+    """
+    Parses the name, resident memory in kB and total CPU time in clock ticks out of a /proc/[pid]/stat file.
+    """
+    # The name is the only field which can contain spaces or parentheses, so the fields are counted from its closing parenthesis
+    start, end = data.find(b"("), data.rfind(b")")
+    fields = data[end+2:].split()
+
+    return [data[start+1:end].decode(errors="replace"), int(fields[21]) * _page_size // 1024, int(fields[11]) + int(fields[12])]
+
+# Long enough for any stat file, whose only variable length field is a name of at most 64 bytes
+_pid_stat_size = 1024
+
+_clock_ticks = os.sysconf("SC_CLK_TCK")
+_page_size = os.sysconf("SC_PAGE_SIZE")
\ No newline at end of file
@@ -0,0 +1,10 @@
+from typing import Tuple
+
+def _parse_pressure(data: memoryview) -> Tuple[float, float, float]:
+    """
+    Parses the avg10, avg60 and avg300 values of the `some` line of a /proc/pressure file, i.e. the percentage of time at least one task was stalled.
+    """
+    fields = data.tobytes().split(b"\n", 1)[0].split()
+    return tuple(float(x.split(b"=")[1]) for x in fields[1:4])
+
+parser = _parse_pressure
\ No newline at end of file
@@ -0,0 +1,196 @@
+import importlib
+import logging
+import math
+import os
+import threading as th
+import time
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Union
+
+class source():
+    """
+    A shared, parsed snapshot of a single procfs file.
+
+    The file is opened once and kept open, and is read into a buffer that is reused between reads. Calling `read` returns the parsed contents of the file, rereading and reparsing it only when the previous snapshot is older than `ttl` seconds. Every module that needs the same file within a single scheduling instant therefore shares one read and one parse. The parsed value is shared between all callers, so it must be treated as read-only.
+
+    Sources are cached per process. Modules running in the `process` execution mode get their own cache in the child process.
+
+    Args:
+
+        Path:
+            The path of the file to read
+        Parser:
+            A function that turns the raw bytes of the file into the value returned by `read`. The bytes are handed over as a view of the reused buffer, so the parser must not keep a reference to them.
+        Ttl:
+            The number of seconds a snapshot is considered fresh
+    """
+    def __init__(self, path: str, parser: Callable[[bytes], Any], ttl: float = None) -> None:
+        self.path = path
+        self.parser = parser
+        self.ttl = ttl if ttl is not None else _default_ttl
+
+        self.fd = os.open(path, os.O_RDONLY)
+        self._buffer = bytearray(4096)
+        self._lock = th.Lock()
+        self._stamp = -math.inf
+        self._value = None
+
+    def read(self) -> Any:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._stamp > self.ttl:
+                self._value = self.parser(self._read_raw())
+                self._stamp = now
+
+            return self._value
+
+    def _read_raw(self) -> memoryview:
+        """
+        Reads the entire file in one go into the reused buffer, growing the buffer until the file fits.
+        """
+        size = os.preadv(self.fd, [self._buffer], 0)
+        while size == len(self._buffer):
+            self._buffer = bytearray(2 * len(self._buffer))
+            size = os.preadv(self.fd, [self._buffer], 0)
+
+        return memoryview(self._buffer)[:size]
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+    @staticmethod
+    def procure(path: str) -> "source":
+        with _procure_lock:
+            if path not in _existing_sources:
+                logging.info(f"Opening shared source for {path}")
+                _existing_sources[path] = source(path, _parser(path))
+
+            return _existing_sources[path]
+
+def numa_nodes() -> Dict[int, List[int]]:
+    """
+    Maps every NUMA node to the CPUs that belong to it. Systems without NUMA information are treated as a single node holding every CPU.
+    """
+    nodes = {}
+    try:
+        for x in os.scandir("/sys/devices/system/node"):
+            if x.name.startswith("node") and x.name[4:].isdigit():
+                nodes[int(x.name[4:])] = _parse_cpu_list(_read_text(f"{x.path}/cpulist") or "")
+    except OSError:
+        pass
+
+    nodes = {k: v for k, v in sorted(nodes.items()) if v}
+    return nodes if nodes else {0: list(range(os.cpu_count()))}
+
+def _parse_cpu_list(text: str) -> List[int]:
+    """
+    Parses a kernel CPU list such as `0-3,8-11`.
+    """
+    cpus = []
+    for part in text.split(","):
+        if "-" in part:
+            a, b = part.split("-")
+            cpus.extend(range(int(a), int(b) + 1))
+        elif part:
+            cpus.append(int(part))
+    return cpus
+
+def _read_text(path: str) -> Union[str, None]:
+    try:
+        with open(path) as fi:
+            return fi.read().strip()
+    except OSError:
+        return None
+
+def known(path: str) -> bool:
+    """
+    Whether a path is one of the files with a parser of its own or one of the tables, i.e. something a module reads.
+    """
+    return path in _parsers or path in _tables
+
+def resolve(paths: Iterable[str]) -> Mapping[str, Any]:
+    return {x: _procure(x) for x in paths}
+
+def _procure(path: str) -> Any:
+    if path not in _tables:
+        return source.procure(path)
+
+    with _procure_lock:
+        if path not in _existing_sources:
+            logging.info(f"Opening shared table for {path}")
+            _existing_sources[path] = _load(_tables[path])()
+
+        return _existing_sources[path]
+
+def _parser(path: str) -> Callable[[memoryview], Any]:
+    """
+    The parser of a file. The module providing it is only imported once the file is first read, files without a parser of their own are split into lines.
+    """
+    return _load(_parsers[path]) if path in _parsers else _parse_lines
+
+def _load(path: str) -> Any:
+    """
+    Imports the object a dotted `package.module:attribute` path refers to.
+    """
+    module, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+def _parse_lines(data: memoryview) -> List[str]:
+    return str(data, "ascii").splitlines()
+
+# The counters kept for every cpu line of /proc/stat
+stat_fields = ("user", "system", "idle")
+
+# The counters kept for every disk in /proc/diskstats
+disk_fields = ("reads", "sectors read", "ms reading", "writes", "sectors written", "ms writing")
+
+# The counters kept for every interface in /proc/net/dev
+net_fields = ("rx bytes", "rx packets", "tx bytes", "tx packets")
+
+# The files with a parser of their own, mapped to the dotted path of the parser. Every parser lives in a module of its own, so only the parsers of the files that are read are imported.
+_parsers: Dict[str, str] = {
+    "/proc/stat": "sources.stat:parser",
+    "/proc/meminfo": "sources.meminfo:parser",
+    "/proc/diskstats": "sources.diskstats:parser",
+    "/proc/net/dev": "sources.net_dev:parser",
+    "/proc/pressure/cpu": "sources.pressure:parser",
+    "/proc/pressure/memory": "sources.pressure:parser",
+    "/proc/pressure/io": "sources.pressure:parser",
+}
+
+# Short enough to never span two deadlines of a sensibly configured tile, long enough to cover the jitter between tiles that are due at the same instant
+_default_ttl = 0.02
+
+# The pseudo path tasks list under `sources` to use the shared process table
+processes = "/proc/[pid]/stat"
+
+# The path tasks list under `sources` to use the shared sensor table
+sensors = "/sys/class/hwmon"
+
+# The path tasks list under `sources` to use the shared cgroup table
+cgroups = "/sys/fs/cgroup"
+
+# Paths which are served by a table of many files rather than a single source, mapped to the dotted path of the table
+_tables: Dict[str, str] = {
+    processes: "sources.pid_stat:process_table",
+    sensors: "sources.hwmon:sensor_table",
+    cgroups: "sources.cgroup:cgroup_table",
+}
+
+_existing_sources: Dict[str, Any] = {}
+_procure_lock = th.Lock()
+
+def _after_fork() -> None:
+    """
+    Gives a forked child process an empty cache of its own. The inherited files are closed, as nothing in the child refers to them anymore, and the lock is replaced since another thread of the parent may have held it during the fork.
+    """
+    global _procure_lock
+    _procure_lock = th.Lock()
+
+    for x in _existing_sources.values():
+        try:
+            x.close()
+        except OSError:
+            continue
+    _existing_sources.clear()
+
+os.register_at_fork(after_in_child=_after_fork)
\ No newline at end of file
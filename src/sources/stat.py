@@ -0,0 +1,34 @@
+import re
+from array import array
+from typing import Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def _parse_stat(data: memoryview) -> Union[array, "np.ndarray"]:
+    """
+    Parses the `cpu` lines of /proc/stat into a packed array of unsigned integers. Every line becomes one row of the counters named in `stat_fields`, the aggregate line first followed by one row per core. If NumPy is installed the array is returned as a NumPy array of shape (rows, len(stat_fields)), otherwise as a flat `array`.
+
+    The cpu lines are parsed straight out of the read buffer. With NumPy the labels are stripped from the cpu block and the remaining counters are converted in a single pass, so no object is created per core. Otherwise a precompiled pattern picks out only the needed fields of every line.
+    """
+    end = data.obj.find(b"\nintr", 0, len(data))
+    end = end if end >= 0 else len(data)
+
+    if np is not None:
+        rows = data.obj.count(b"cpu", 0, end)
+        counters = np.fromstring(_stat_label.sub(b"", data[:end]), dtype=np.uint64, sep=" ")
+        return counters.reshape(rows, -1)[:, _stat_indices]
+
+    return array("Q", [int(x) for m in _stat_line.finditer(data, 0, end) for x in m.groups()])
+
+# The column of every counter in `stat_fields` in a cpu line of the file
+_stat_columns = (1, 3, 4)
+
+# The counters as indices into a cpu line without its label, and a pattern capturing them from a cpu line
+_stat_indices = [x - 1 for x in _stat_columns]
+_stat_line = re.compile(rb"^cpu\d*" + b"".join(rb" +\d+" * (b - a - 1) + rb" +(\d+)" for a, b in zip((0,) + _stat_columns, _stat_columns)), re.MULTILINE)
+_stat_label = re.compile(rb"cpu\d*")
+
+parser = _parse_stat
\ No newline at end of file
@@ -0,0 +1 @@
+from .storage import *
\ No newline at end of file
@@ -0,0 +1,373 @@
+import math
+from array import array
+from collections import deque
+from typing import Any, Iterable, Iterator, List, Tuple, Union
+
+class ring():
+    """
+    A bounded history of samples where appending is O(1) and the oldest sample is dropped once the capacity is reached.
+
+    Numeric samples of a fixed shape are packed into a single preallocated array of doubles, so the memory used by the history never changes after it is created. Samples without a shape, or samples that stop fitting the shape, are kept in a bounded deque instead.
+
+    Args:
+
+        Capacity:
+            The maximum number of samples held by the history
+        Shape:
+            The shape of a single sample. `()` is a single number, `(n,)` a tuple of `n` numbers, and `(n, m)` a list of `n` tuples of `m` numbers. If None the samples are stored as is.
+        Initial:
+            An iterable of samples the history starts out with
+    """
+    def __init__(self, capacity: int, shape: Union[Tuple[int, ...], None] = None, initial: Iterable[Any] = ()) -> None:
+        assert capacity > 0, f"The capacity of a history has to be positive. The given capacity was {capacity}"
+
+        self.capacity = capacity
+        self.shape = tuple(shape) if shape is not None else None
+        self._objects: deque = None
+        self._data: array = None
+        self._start = 0
+        self._len = 0
+
+        if self.shape is None:
+            self._objects = deque(maxlen=capacity)
+        else:
+            self.width = math.prod(self.shape)
+            self._data = array("d", [0.0]) * (capacity * self.width)
+
+        for x in initial:
+            self.append(x)
+
+    def append(self, value: Any) -> None:
+        if self._data is not None:
+            flat = flatten(value)
+            if flat is not None and len(flat) == self.width:
+                end = (self._start + self._len) % self.capacity * self.width
+                self._data[end:end+self.width] = flat
+
+                if self._len < self.capacity:
+                    self._len += 1
+                else:
+                    self._start = (self._start + 1) % self.capacity
+                return
+
+            self._demote()
+
+        self._objects.append(value)
+
+    def resize(self, capacity: int, fill: Any = None) -> None:
+        """
+        Changes the capacity of the history, keeping the most recent samples. If `fill` is given the history is padded with it as its oldest samples until it is full.
+        """
+        if capacity == self.capacity and (fill is None or len(self) == capacity):
+            return
+
+        values = list(self)[-capacity:]
+        if fill is not None:
+            values = [fill] * (capacity - len(values)) + values
+
+        self.__init__(capacity, self.shape if self._data is not None else None, values)
+
+    def clear(self) -> None:
+        if self._data is not None:
+            self._start = 0
+            self._len = 0
+        else:
+            self._objects.clear()
+
+    def _demote(self) -> None:
+        """
+        Moves the samples into a deque once a sample no longer fits the packed layout.
+        """
+        values = list(self)
+        self._data = None
+        self._objects = deque(values, maxlen=self.capacity)
+
+    def flat(self, index: int) -> array:
+        """
+        The sample at the given index as a flat array of doubles, without building the nested tuples of the sample.
+        """
+        if self._data is None:
+            return flatten(self._objects[index])
+
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("history index out of range")
+
+        offset = (self._start + index) % self.capacity * self.width
+        return self._data[offset:offset+self.width]
+
+    def view(self, start: int) -> "view":
+        """
+        The samples from the given index to the most recent one, without copying them.
+        """
+        return view(self, start)
+
+    def _get(self, index: int) -> Any:
+        offset = (self._start + index) % self.capacity * self.width
+        return unflatten(self._data[offset:offset+self.width].tolist(), self.shape)
+
+    def __getitem__(self, index: int) -> Any:
+        if self._data is None:
+            return self._objects[index]
+
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("history index out of range")
+
+        return self._get(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._data is None:
+            return iter(list(self._objects))
+
+        return (self._get(i) for i in range(self._len))
+
+    def __len__(self) -> int:
+        return self._len if self._data is not None else len(self._objects)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __str__(self) -> str:
+        return f"ring({list(self)}, capacity={self.capacity})"
+
+class view():
+    """
+    A read-only window onto the most recent samples of a history. The window starts at a fixed index of the history, so it only holds the samples it was created for until more samples are appended.
+
+    Args:
+
+        History:
+            The history the window looks at
+        Start:
+            The index of the oldest sample in the window
+    """
+    def __init__(self, history: ring, start: int) -> None:
+        self.history = history
+        self.start = min(max(start, 0), len(history))
+
+    def flat(self, index: int) -> array:
+        return self.history.flat(self._index(index))
+
+    def _index(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+
+        return self.start + index
+
+    def __getitem__(self, index: int) -> Any:
+        return self.history[self._index(index)]
+
+    def __iter__(self) -> Iterator[Any]:
+        return (self.history[i] for i in range(self.start, len(self.history)))
+
+    def __len__(self) -> int:
+        return len(self.history) - self.start
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+class columns():
+    """
+    A fixed-capacity table of numeric columns which share a single ring index.
+
+    Each column is a preallocated array of doubles, so rows are never allocated as Python objects. The first column is expected to hold monotonically increasing timestamps, which lets `index` find rows by time with a binary search.
+
+    Args:
+
+        Capacity:
+            The maximum number of rows held by the table
+        Names:
+            The names of the columns
+    """
+    def __init__(self, capacity: int, names: Iterable[str]) -> None:
+        assert capacity > 0, f"The capacity of a table has to be positive. The given capacity was {capacity}"
+
+        self.capacity = capacity
+        self.names = list(names)
+        self._columns = {x: array("d", [0.0]) * capacity for x in self.names}
+        self._start = 0
+        self._len = 0
+
+    def append(self, *values: float) -> None:
+        end = (self._start + self._len) % self.capacity
+        for name, v in zip(self.names, values):
+            self._columns[name][end] = v
+
+        if self._len < self.capacity:
+            self._len += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def remap(self, names: Iterable[str]) -> None:
+        """
+        Changes the columns of the table. Columns that are kept hold on to their values, new columns start out as zeros.
+        """
+        self.names = list(names)
+        self._columns = {x: self._columns[x] if x in self._columns else array("d", [0.0]) * self.capacity for x in self.names}
+
+    def get(self, name: str, index: int) -> float:
+        if index < 0:
+            index += self._len
+        return self._columns[name][(self._start + index) % self.capacity]
+
+    def index(self, t: float) -> int:
+        """
+        The index of the first row with a timestamp at or after `t`.
+        """
+        lo, hi = 0, self._len
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.get(self.names[0], mid) < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def slice(self, name: str, start: int, stop: int = None) -> List[float]:
+        stop = self._len if stop is None else stop
+        column = self._columns[name]
+        first = (self._start + start) % self.capacity
+        last = (self._start + stop) % self.capacity
+
+        if stop <= start:
+            return []
+        elif first < last:
+            return column[first:last].tolist()
+        else:
+            return column[first:].tolist() + column[:last].tolist()
+
+    def __len__(self) -> int:
+        return self._len
+
+class series():
+    """
+    A time series for a single metric which keeps raw samples along with downsampled retention tiers.
+
+    Every tier aggregates the raw samples into fixed buckets and stores the minimum, maximum and mean of each bucket once the bucket is complete. Querying a window picks the coarsest level that still covers the window with at least one point per output column and thins it out to a few points per column, so the cost of a query depends on the number of columns rather than on how much history is kept.
+
+    Args:
+
+        Capacity:
+            The number of raw samples to keep
+        Tiers:
+            An iterable of (bucket width in seconds, number of buckets) tuples, ordered from fine to coarse
+    """
+    def __init__(self, capacity: int = None, tiers: Iterable[Tuple[float, int]] = None) -> None:
+        self.raw = columns(capacity if capacity else _default_series_capacity, ["time", "value"])
+        self.tiers = [(float(w), columns(n, ["time", "min", "max", "mean"])) for w, n in (tiers if tiers is not None else _default_tiers)]
+
+        # The bucket currently being filled for each tier: [start, min, max, sum, count]
+        self._open = [None] * len(self.tiers)
+
+    def append(self, t: float, value: float) -> None:
+        self.raw.append(t, value)
+
+        for i, (width, table) in enumerate(self.tiers):
+            bucket = self._open[i]
+
+            if bucket is not None and t >= bucket[0] + width:
+                table.append(bucket[0], bucket[1], bucket[2], bucket[3] / bucket[4])
+                bucket = None
+
+            if bucket is None:
+                self._open[i] = [t - t % width, value, value, value, 1]
+            else:
+                bucket[1] = min(bucket[1], value)
+                bucket[2] = max(bucket[2], value)
+                bucket[3] += value
+                bucket[4] += 1
+
+    def window(self, seconds: float, width: int, now: float = None, column: str = "mean") -> List[Union[float, None]]:
+        """
+        Resamples the last `seconds` of the series into `width` columns. Each column holds the mean of the points falling into it, or None if no point does. Tiers are read through the given aggregate column ("min", "max", or "mean").
+        """
+        if not len(self.raw) or width <= 0:
+            return [None] * max(width, 0)
+
+        now = self.raw.get("time", -1) if now is None else now
+        start = now - seconds
+        times, values = self._points(start, seconds, width, column)
+
+        out = [0.0] * width
+        counts = [0] * width
+        for t, v in zip(times, values):
+            i = min(int((t - start) / seconds * width), width - 1)
+            if i >= 0:
+                out[i] += v
+                counts[i] += 1
+
+        return [x / n if n else None for x, n in zip(out, counts)]
+
+    def _points(self, start: float, seconds: float, width: int, column: str) -> Tuple[List[float], List[float]]:
+        """
+        Returns the timestamps and values of the coarsest level which covers `start` while still having at least one point per column. If that level holds more than a few points per column it is thinned out. A tier also returns the partial aggregate of the bucket it is still filling, as the newest samples are only found there.
+        """
+        levels = [(self.raw, "value", self._resolution(), None)] + [(table, column, w, self._open[i]) for i, (w, table) in enumerate(self.tiers) if len(table)]
+        covering = [x for x in levels if x[0].get("time", 0) <= start] or levels[-1:]
+
+        fine = [x for x in covering if x[2] <= seconds / width]
+        table, name, _, bucket = fine[-1] if fine else covering[0]
+
+        first = table.index(start)
+        step = max(1, (len(table) - first) // (_points_per_column * width))
+        times, values = table.slice("time", first)[::step], table.slice(name, first)[::step]
+
+        if bucket is not None:
+            times.append(bucket[0])
+            values.append({"min": bucket[1], "max": bucket[2]}.get(name, bucket[3] / bucket[4]))
+
+        return times, values
+
+    def _resolution(self) -> float:
+        """
+        The average time between two raw samples.
+        """
+        if len(self.raw) < 2:
+            return 0.0
+        return (self.raw.get("time", -1) - self.raw.get("time", 0)) / (len(self.raw) - 1)
+
+def flatten(value: Any) -> Union[array, None]:
+    """
+    Flattens a number, a nested sequence of numbers, or a packed array into an array of doubles. Returns None for anything else. NumPy arrays are converted in a single call without an object per element.
+    """
+    if isinstance(value, array):
+        return value if value.typecode == "d" else array("d", value)
+    elif hasattr(value, "dtype"):
+        return array("d", value.astype("d").tobytes())
+
+    flat = array("d")
+
+    def _visit(v) -> bool:
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            flat.append(v)
+            return True
+        elif isinstance(v, (tuple, list)):
+            return all(_visit(x) for x in v)
+        return False
+
+    return flat if _visit(value) else None
+
+def unflatten(flat: List[float], shape: Tuple[int, ...]) -> Any:
+    """
+    The inverse of `flatten` for a sample of the given shape.
+    """
+    if len(shape) == 0:
+        return flat[0]
+    elif len(shape) == 1:
+        return tuple(flat)
+    else:
+        step = len(flat) // shape[0]
+        return [tuple(flat[i:i+step]) for i in range(0, len(flat), step)]
+
+# At 1 Hz this is the last hour of raw samples
+_default_series_capacity = 3600
+
+# Ten second buckets for a day and one minute buckets for a week
+_default_tiers = [(10, 8640), (60, 10080)]
+
+_points_per_column = 4
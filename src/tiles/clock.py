@@ -0,0 +1,32 @@
+import time
+from typing import Any, Mapping
+
+import blessed as bl
+
+from .tiles import line_tile, realtime_tile
+
+class time_tile(line_tile, realtime_tile):
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs.update({"func": time.time, "func_args": [], "func_kwargs": {}, "return_type": float, "shape": (), "text": ""})
+        super(time_tile, self).__init__(*args, **kwargs)
+
+    def render(self, term: bl.Terminal) -> None:
+        self.text = f"{self.module.fetch(self):.3f}"
+        super(time_tile, self).render(term)
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return time_tile(**conf)
+
+class ctime_tile(line_tile, realtime_tile):
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs.update({"func": time.ctime, "func_args": [], "func_kwargs": {}, "return_type": float, "text": ""})
+        super(ctime_tile, self).__init__(*args, **kwargs)
+
+    def render(self, term: bl.Terminal) -> None:
+        self.text = self.module.fetch(self)
+        super(ctime_tile, self).render(term)
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return ctime_tile(**conf)
@@ -0,0 +1,38 @@
+from typing import Any, Mapping
+
+import blessed as bl
+
+import modules as mo
+import sources as so
+
+from .tiles import _format_size, realtime_tile, table_tile
+
+class container_tile(table_tile, realtime_tile):
+    """
+    A tile which lists the cgroups, i.e. the containers on container hosts, using the most CPU
+
+    Args:
+
+        Count:
+            The number of cgroups listed
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        self.count = kwargs.get("count", _default_container_count)
+        kwargs.update({"func": mo.CGROUPS, "func_args": [], "func_kwargs": {"sources": [so.cgroups], "count": self.count}, "return_type": list, "initial": []})
+        super(container_tile, self).__init__(*args, **kwargs)
+
+    def render(self, term: bl.Terminal) -> None:
+        super(container_tile, self).render(term)
+
+        rows = self.module.fetch(self)
+
+        lines = [f"{'CPU%':>6} {'MEM':>10} {'PSI':>6} {'IO':>12}  CGROUP"]
+        lines += [f"{cpu:6.1f} {_format_size(memory):>10} {pressure:6.2f} {_format_size(io/1024) + '/s':>12}  {name}" for name, cpu, memory, pressure, io in rows]
+
+        self.draw_lines(term, lines)
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return container_tile(**conf)
+
+_default_container_count = 10
@@ -0,0 +1,97 @@
+import math
+import os
+from array import array
+from typing import Any, List, Mapping
+
+import blessed as bl
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import modules as mo
+import sources as so
+
+from .tiles import _line_subdivisions, min_diff, multi_line_tile, plot_tile, realtime_tile, table_tile
+
+class cpu_tile(multi_line_tile, table_tile, realtime_tile):
+    """
+    A tile which shows the load of every core since the previous update
+
+    Args:
+
+        Dense:
+            If True every core is shown as a single bar in a grid with one block of rows per NUMA node, which fits hundreds of cores into a small tile. Otherwise every core gets its own labelled line.
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        self.dense = kwargs.get("dense", False)
+        self.nodes = so.numa_nodes() if self.dense else None
+        kwargs.update({"num_lines": os.cpu_count(), "func": mo.CPU, "func_args": [], "func_kwargs": {"sources": ["/proc/stat"]}, "return_type": list, "initial": [(0, 0)] * os.cpu_count(), "store_results": True, "capacity": 2, "shape": (os.cpu_count(), 2)})
+        super(cpu_tile, self).__init__(*args, **kwargs)
+
+    def render(self, term: bl.Terminal) -> None:
+        super(cpu_tile, self).render(term)
+
+        out = self.module.fetch(self)
+        cur = _core_usage(out.flat(0), out.flat(-1))
+
+        if self.dense:
+            self._render_dense(term, cur)
+            return
+
+        num_core_width = math.ceil(math.log10(os.cpu_count()+0.1))
+        strs = [f"Core {str(i).rjust(num_core_width)}: {x:5.1f}%" for i, x in enumerate(cur)]
+
+        # Every line is positioned with an escape sequence so the whole tile is drawn with a single write
+        with term.location():
+            print("".join(term.move_xy(x - len(s)//2, y) + s for (x, y), s in zip(self.anchors, strs)), end="")
+
+    def _render_dense(self, term: bl.Terminal, cur: List[float]) -> None:
+        label_width = len(f"N{max(self.nodes)}") + 1
+        width = max(self.dimensions.x - label_width, 1)
+
+        lines = []
+        for node, cpus in self.nodes.items():
+            cells = "".join(_line_subdivisions[min_diff(range(9), cur[c] / 100 * 8)/8] for c in cpus if c < len(cur))
+            lines += [(f"N{node}" if i == 0 else "").ljust(label_width) + cells[i:i+width] for i in range(0, len(cells), width)]
+
+        self.draw_lines(term, lines)
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return cpu_tile(**conf)
+
+class cpu_load_tile(plot_tile):
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs.update({"func": mo.CPU_LOAD, "func_args": [], "func_kwargs": {"sources": ["/proc/stat"]}, "return_type": float, "initial": (0, 0), "shape": (2,)})
+        super(cpu_load_tile, self).__init__(*args, **kwargs)
+        self._raw_history.append((0, 0))
+
+    def render(self, term: bl.Terminal) -> None:
+        super(cpu_load_tile, self).render(term)
+
+        if self.module.unread(self):
+            self._raw_history.append(self.module.fetch(self))
+            last = self._raw_history[-2]
+            cur = self._raw_history[-1]
+            self.record((cur[0]-last[0])/max(cur[1]-last[1], 1))
+
+        super(cpu_load_tile, self).plot(term)
+
+        with term.location(*self.start_loc):
+            print(self.text, end="")
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return cpu_load_tile(**conf)
+
+def _core_usage(last: array, cur: array) -> List[float]:
+    """
+    The load in percent of every core from two flat samples of (busy, total) pairs. The differences are computed with NumPy if it is installed.
+    """
+    if np is not None:
+        delta = np.frombuffer(cur) - np.frombuffer(last)
+        return (delta[0::2] / np.maximum(delta[1::2], 1) * 100).tolist()
+
+    return [(cb-lb)/max(ct-lt, 1) * 100 for lb, lt, cb, ct in zip(last[0::2], last[1::2], cur[0::2], cur[1::2])]
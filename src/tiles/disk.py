@@ -0,0 +1,56 @@
+from array import array
+from typing import Any, List, Mapping, Sequence, Tuple
+
+import blessed as bl
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import modules as mo
+import sources as so
+
+from .tiles import _format_size, realtime_tile, table_tile
+
+class disk_tile(table_tile, realtime_tile):
+    """
+    A tile which lists the read and write operations per second, throughput and average latency of every disk since the previous update
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs.update({"func": mo.DISK, "func_args": [], "func_kwargs": {"sources": ["/proc/diskstats"]}, "return_type": tuple, "initial": (0.0, (), array("Q")), "store_results": True, "capacity": 2})
+        super(disk_tile, self).__init__(*args, **kwargs)
+
+    def render(self, term: bl.Terminal) -> None:
+        super(disk_tile, self).render(term)
+
+        out = self.module.fetch(self)
+        (lt, last_names, last), (ct, names, cur) = out[0], out[-1]
+        if names != last_names:
+            last = cur
+
+        lines = [f"{'DEVICE':<12} {'R/s':>8} {'W/s':>8} {'READ':>12} {'WRITE':>12} {'R LAT':>8} {'W LAT':>8}"]
+        for name, (reads, writes, read, written, rlat, wlat) in zip(names, _disk_rates(last, cur, max(ct - lt, 1e-9))):
+            lines.append(f"{name:<12} {reads:8.1f} {writes:8.1f} {_format_size(read) + '/s':>12} {_format_size(written) + '/s':>12} {rlat:6.2f}ms {wlat:6.2f}ms")
+        self.draw_lines(term, lines)
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return disk_tile(**conf)
+
+def _disk_rates(last: Sequence[int], cur: Sequence[int], dt: float) -> List[Tuple[float, ...]]:
+    """
+    The reads and writes per second, kB read and written per second, and average read and write latency in ms of every disk from two packed samples of the counters in `sources.disk_fields`. The counters of all disks are processed as whole arrays with NumPy if it is installed.
+    """
+    n = len(so.disk_fields)
+
+    if np is not None:
+        delta = (np.asarray(cur, dtype=np.float64) - np.asarray(last, dtype=np.float64)).reshape(-1, n)
+        reads, rsec, rms, writes, wsec, wms = delta.T
+        return np.column_stack((reads / dt, writes / dt, rsec * (_sector_size / 1024 / dt), wsec * (_sector_size / 1024 / dt), rms / np.maximum(reads, 1), wms / np.maximum(writes, 1))).tolist()
+
+    rows = zip(*(map(int.__sub__, cur[i::n], last[i::n]) for i in range(n)))
+    return [(reads / dt, writes / dt, rsec * _sector_size / 1024 / dt, wsec * _sector_size / 1024 / dt, rms / max(reads, 1), wms / max(writes, 1)) for reads, rsec, rms, writes, wsec, wms in rows]
+
+# /proc/diskstats counts sectors of 512 bytes regardless of the sector size of the device
+_sector_size = 512
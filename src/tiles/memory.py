@@ -0,0 +1,64 @@
+from typing import Any, Mapping
+
+import blessed as bl
+
+import modules as mo
+
+from .tiles import _format_size, line_tile, multi_line_tile, plot_tile, realtime_tile
+
+class ram_tile(multi_line_tile, realtime_tile):
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs.update({"num_lines": 4, "func": mo.RAM, "func_args": [], "func_kwargs": {"sources": ["/proc/meminfo"]}, "return_type": tuple, "initial": (0, 0, 0, 0), "shape": (4,)})
+        super(ram_tile, self).__init__(*args, **kwargs)
+
+    def render(self, term: bl.Terminal) -> None:
+        super(ram_tile, self).render(term)
+
+        out = self.module.fetch(self)
+
+        names = ["Free:", "In Use:", "Available:", "Total:"]
+
+        strs = [f"{_type.ljust(max([len(x) for x in names]))} {_format_size(x)}" for _type, x in zip(names, out)]
+
+        for (x, y), s in zip(self.anchors, strs):
+            with term.location(x - len(s)//2, y):
+                print(s, end="")
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return ram_tile(**conf)
+
+class ram_load_tile(plot_tile):
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs.update({"func": mo.RAM_LOAD, "func_args": [], "func_kwargs": {"sources": ["/proc/meminfo"]}, "return_type": float, "shape": ()})
+        super(ram_load_tile, self).__init__(*args, **kwargs)
+        self._raw_history.append((0, 0))
+
+    def render(self, term: bl.Terminal) -> None:
+        super(ram_load_tile, self).render(term)
+
+        if self.module.unread(self):
+            self.record(self.module.fetch(self))
+
+        super(ram_load_tile, self).plot(term)
+
+        with term.location(*self.start_loc):
+            print(self.text, end="")
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return ram_load_tile(**conf)
+
+class swap_tile(line_tile, realtime_tile):
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs.update({"func": mo.SWAP, "func_args": [], "func_kwargs": {"sources": ["/proc/meminfo"]}, "return_type": tuple, "initial": (0, 0), "shape": (2,), "text": ""})
+        super(swap_tile, self).__init__(*args, **kwargs)
+
+    def render(self, term: bl.Terminal) -> None:
+        used, total = self.module.fetch(self)
+        self.text = f"SWAP: {used / max(total, 1) * 100:5.1f}% {_format_size(used)} / {_format_size(total)}"
+        super(swap_tile, self).render(term)
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return swap_tile(**conf)
@@ -0,0 +1,109 @@
+from array import array
+from operator import add
+from typing import Any, List, Mapping, Sequence, Tuple, Union
+
+import blessed as bl
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import modules as mo
+import sources as so
+import storage as st
+
+from .tiles import _format_size, _line_subdivisions, min_diff, realtime_tile, table_tile
+
+class network_tile(table_tile, realtime_tile):
+    """
+    A tile which lists the received and transmitted bytes and packets per second of every network interface along with a sparkline of its recent throughput
+
+    Args:
+
+        History:
+            The number of updates kept for the sparklines
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs.update({"func": mo.NETWORK, "func_args": [], "func_kwargs": {"sources": ["/proc/net/dev"]}, "return_type": tuple, "initial": (0.0, (), array("Q")), "store_results": True, "capacity": 2})
+        super(network_tile, self).__init__(*args, **kwargs)
+
+        self._capacity = kwargs.get("history", _default_sparkline_length)
+        self.history = st.columns(self._capacity, ["time"])
+        self._names: Tuple[str, ...] = ()
+
+    def render(self, term: bl.Terminal) -> None:
+        super(network_tile, self).render(term)
+
+        # Without a new sample the rates of the previous interval are shown again, but not added to the sparklines a second time
+        fresh = self.module.unread(self)
+        out = self.module.fetch(self)
+        (lt, last_names, last), (ct, names, cur) = out[0], out[-1]
+        n = len(so.net_fields)
+
+        if names != last_names:
+            last = _remap(last_names, last, names, cur, n)
+
+        # The throughput of all interfaces is kept in a single table with a column per interface. When interfaces come and go the columns are remapped, so the sparklines of the other interfaces are kept.
+        if names != self._names:
+            self._names = names
+            self.history.remap(["time", *names])
+
+        rates, throughput = _net_rates(last, cur, max(ct - lt, 1e-9))
+        if fresh:
+            self.history.append(ct, *throughput)
+
+        width = max(self.dimensions.x - 60, 0)
+        lines = [f"{'INTERFACE':<12} {'RX':>12} {'RX PKT/s':>9} {'TX':>12} {'TX PKT/s':>9}"]
+        for name, rx, rxp, tx, txp in zip(names, rates[0::n], rates[1::n], rates[2::n], rates[3::n]):
+            lines.append(f"{name:<12} {_format_size(rx/1024) + '/s':>12} {rxp:9.1f} {_format_size(tx/1024) + '/s':>12} {txp:9.1f}  {_sparkline(self.history.slice(name, max(len(self.history) - width, 0)))}")
+        self.draw_lines(term, lines)
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return network_tile(**conf)
+
+def _net_rates(last: Sequence[int], cur: Sequence[int], dt: float) -> Tuple[Union[array, "np.ndarray"], Union[array, "np.ndarray"]]:
+    """
+    The rates of the counters in `sources.net_fields` of every interface from two packed samples, and the combined received and transmitted bytes per second of every interface. The counters of all interfaces are processed as whole arrays with NumPy if it is installed.
+    """
+    n = len(so.net_fields)
+
+    if np is not None:
+        c, l = np.asarray(cur, dtype=np.float64), np.asarray(last, dtype=np.float64)
+        rates = np.where(c >= l, c - l, np.where(l < 2**32, c + 2**32 - l, c)) / dt
+        rows = rates.reshape(-1, n)
+        return rates, rows[:, 0] + rows[:, 2]
+
+    rates = array("d", map(_counter_delta, cur, last))
+    for i in range(len(rates)):
+        rates[i] /= dt
+    return rates, array("d", map(add, rates[0::n], rates[2::n]))
+
+def _remap(names: Sequence[str], counters: Sequence[int], new_names: Sequence[str], new_counters: Sequence[int], n: int) -> array:
+    """
+    The counters of `names` rearranged into the rows of `new_names`. Interfaces which were not there before take their rows from `new_counters`, so they start out without any change.
+    """
+    rows = {x: i for i, x in enumerate(names)}
+    out = array("Q", new_counters)
+    for j, x in enumerate(new_names):
+        if x in rows:
+            i = rows[x]
+            out[j*n:(j+1)*n] = array("Q", counters[i*n:(i+1)*n])
+    return out
+
+def _counter_delta(cur: int, last: int) -> int:
+    """
+    The change of a cumulative counter. A counter that went down is assumed to have wrapped around if it fits in 32 bits, otherwise it is assumed to have been reset.
+    """
+    if cur >= last:
+        return cur - last
+    elif last < 2**32:
+        return cur + 2**32 - last
+    return cur
+
+def _sparkline(values: List[float]) -> str:
+    peak = max(values, default=0) or 1
+    return "".join(_line_subdivisions[min_diff(range(9), x / peak * 8)/8] for x in values)
+
+_default_sparkline_length = 60
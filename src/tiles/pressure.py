@@ -0,0 +1,50 @@
+from typing import Any, Mapping
+
+import blessed as bl
+
+import modules as mo
+
+from .tiles import realtime_tile, table_tile
+
+class pressure_tile(table_tile, realtime_tile):
+    """
+    A tile which shows how much of the time tasks were stalled waiting for the CPU, memory, or I/O over the last 10, 60, and 300 seconds
+
+    The tile is sampled at its frequency, and by default also registers a pressure stall trigger on every resource so it is updated as soon as a stall crosses the threshold.
+
+    Args:
+
+        Resources:
+            The resources shown, any of "cpu", "memory", and "io"
+        Threshold:
+            The number of milliseconds tasks have to be stalled within a window for the trigger to fire
+        Window:
+            The length of the trigger window in milliseconds, between 500 and 10000. Without the CAP_SYS_RESOURCE capability the kernel only accepts multiples of 2000.
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        self.resources = kwargs.get("resources", _default_resources)
+        threshold = kwargs.get("threshold", _default_threshold)
+        window = kwargs.get("window", _default_window)
+
+        kwargs.setdefault("executed", "event")
+        kwargs.update({"func": mo.PRESSURE, "func_args": [], "func_kwargs": {"sources": [f"/proc/pressure/{x}" for x in self.resources]}, "return_type": list, "initial": [(0.0, 0.0, 0.0)] * len(self.resources), "shape": (len(self.resources), 3), "events": [(f"/proc/pressure/{x}", f"some {threshold * 1000} {window * 1000}") for x in self.resources]})
+        super(pressure_tile, self).__init__(*args, **kwargs)
+
+    def render(self, term: bl.Terminal) -> None:
+        super(pressure_tile, self).render(term)
+
+        values = self.module.fetch(self)
+
+        lines = [f"{'':<8} {'10s':>7} {'60s':>7} {'300s':>7}"]
+        lines += [f"{name:<8} {a:6.2f}% {b:6.2f}% {c:6.2f}%" for name, (a, b, c) in zip(self.resources, values)]
+
+        self.draw_lines(term, lines)
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return pressure_tile(**conf)
+
+_default_resources = ["cpu", "memory", "io"]
+
+_default_threshold = 100
+_default_window = 2000
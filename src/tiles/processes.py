@@ -0,0 +1,37 @@
+from typing import Any, Mapping
+
+import blessed as bl
+
+import modules as mo
+import sources as so
+
+from .tiles import _format_size, realtime_tile, table_tile
+
+class process_tile(table_tile, realtime_tile):
+    """
+    A tile which lists the processes using the most CPU
+
+    Args:
+
+        Count:
+            The number of processes listed. Only this many rows are sent from the module to the tile, so the scan can run in a separate process without shipping the whole process table.
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        self.count = kwargs.get("count", _default_process_count)
+        kwargs.update({"func": mo.PROCESSES, "func_args": [], "func_kwargs": {"sources": [so.processes], "count": self.count}, "return_type": list, "initial": []})
+        super(process_tile, self).__init__(*args, **kwargs)
+
+    def render(self, term: bl.Terminal) -> None:
+        super(process_tile, self).render(term)
+
+        rows = self.module.fetch(self)
+
+        lines = [f"{'PID':>8} {'CPU%':>6} {'MEM':>10}  NAME"]
+        lines += [f"{pid:>8} {cpu:6.1f} {_format_size(rss):>10}  {name}" for pid, name, cpu, rss in rows]
+        self.draw_lines(term, lines)
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return process_tile(**conf)
+
+_default_process_count = 10
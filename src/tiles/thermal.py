@@ -0,0 +1,40 @@
+from typing import Any, Mapping
+
+import blessed as bl
+
+import modules as mo
+import sources as so
+
+from .tiles import realtime_tile, table_tile
+
+class thermal_tile(table_tile, realtime_tile):
+    """
+    A tile which lists the temperature of every hardware sensor
+
+    Args:
+
+        Threads:
+            If given, the sensors are read by this many threads
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        func_kwargs = {"sources": [so.sensors]}
+        if kwargs.get("threads"):
+            func_kwargs["threads"] = kwargs["threads"]
+
+        kwargs.update({"func": mo.THERMAL, "func_args": [], "func_kwargs": func_kwargs, "return_type": list, "initial": []})
+        super(thermal_tile, self).__init__(*args, **kwargs)
+
+    def render(self, term: bl.Terminal) -> None:
+        super(thermal_tile, self).render(term)
+
+        sensors = self.module.fetch(self)
+        if not sensors:
+            self.draw_lines(term, ["No temperature sensors found"])
+            return
+
+        width = max(len(name) for name, _ in sensors)
+        self.draw_lines(term, [f"{name.ljust(width)} {x:6.1f}°C" for name, x in sensors])
+
+    @staticmethod
+    def from_conf(conf: Mapping[str, Any]):
+        return thermal_tile(**conf)
@@ -1,13 +1,17 @@
+import importlib
+import importlib.util
+import logging
 import math
 import os
+import sys
 import time
 from itertools import accumulate, chain, product, zip_longest
-from typing import Any, Iterable, List, Mapping, Tuple, Type, Union
+from typing import Any, Dict, Iterable, List, Mapping, Tuple, Type, Union
 
 import blessed as bl
 
-import modules as mo
 import realtime as rt
+import storage as st
 
                     # T    B    L    R    TL   TR    BL   BR
 passive_border =    ["─", "─", "│", "│", "┌", "┐", "└", "┘"]
@@ -28,6 +32,17 @@ def _rotate_strings(_iter: Iterable[str]) -> Iterable[str]:
 def _divisors(val: int) -> List[int]:
     return [i for i in range(1, val+1) if val % i == 0]
 
+def _format_size(kb: float) -> str:
+    """
+    Formats a size given in kB with the largest unit that keeps the number at or above 1.
+    """
+    i = 0
+    while kb >= 1024 and i < len(_size_units) - 1:
+        kb /= 1024
+        i += 1
+
+    return f"{kb:.2f} {_size_units[i]}"
+
 # Note: Not a great implementation as it sort of assumes that the border will be made up of UTF-8 characters and that the title wont
 def _overlay(s1: str, s2: str, char=" ") -> str:
     """
@@ -107,6 +122,7 @@ class tile():
         self.title = title
 
         self.frequency = kwargs["frequency"] if "frequency" in kwargs else 1
+        self.overrun = kwargs["overrun"] if "overrun" in kwargs else "skip"
 
         if isinstance(border, bool) and border:
             self.border = passive_border
@@ -119,11 +135,35 @@ class tile():
             self.border = None
             self._original_border = None
 
+        # The terminal size and title the frame was last drawn for, and the terminal size the tile was last laid out for
+        self._frame_key = None
+        self._layout_key = None
+
+    def layout(self, term: bl.Terminal) -> None:
+        """
+        Resolves the fractional origin and offset of the tile into the integer cells it covers. Renders only read the result, so this runs once at startup and again whenever the terminal is resized.
+        """
+        self._layout_key = (term.width, term.height, bool(self.title))
+        self._frame_key = None
+
+        self._outer_loc = start_loc = _Position(round(self.origin[0] * term.width), round(self.origin[1] * term.height))
+        end_loc = _Position(round(self.offset[0] * term.width), round(self.offset[1] * term.height))
+        self.region = (start_loc.x, start_loc.y, end_loc.x - start_loc.x, end_loc.y - start_loc.y)
+
+        self.start_loc = start_loc
+        if self.border or self.title:
+            self.start_loc += (0, 1)
+
+            if self.border:
+                self.start_loc += (1, 0)
+                end_loc -= 1
+
+        self.dimensions = end_loc - self.start_loc
+
     def render(self, term: bl.Terminal) -> None:
         """
         Draws the relevant information to the tile's location in the terminal
         """
-        # TODO: Figure out how to detect if the edges need to be updated or not
         self._update_edges(term)
 
     def move(self, delta: Tuple[float, float]) -> None:
@@ -132,6 +172,7 @@ class tile():
         """
         self.origin = (self.origin[0] + delta[0], self.origin[1] + delta[1])
         self.offset = (self.offset[0] + delta[0], self.offset[1] + delta[1])
+        self._layout_key = None
 
     def scale(self, scale: Union[Tuple[float, float], float]) -> None:
         """
@@ -143,6 +184,7 @@ class tile():
         else:
             self.origin = (scale * self.origin[0], scale * self.origin[1])
             self.offset = (scale * self.offset[0], scale * self.offset[1])
+        self._layout_key = None
 
     def _base_str(self) -> str:
         return f"{type(self)} @ {self.origin} -> {self.offset}"
@@ -156,17 +198,25 @@ class tile():
         with term.location(*self.start_loc):
             print(term.move_down(1).join([filler] * self.dimensions.y), end="")
 
+        self._frame_key = None
         self.render(term)
 
-    def timing(self) -> Iterable[float]:
-        return [(self.frequency, self)]
+    def timing(self) -> Iterable[Tuple[float, Any, str]]:
+        return [(self.frequency, self, self.overrun)]
 
     def _update_edges(self, term) -> None:
+        """
+        Draws the border and title of the tile. Neither changes until the terminal is resized or the title changes, so both are only computed and drawn again in that case. A tile which has not been laid out for the terminal yet is laid out first.
+        """
+        key = (term.width, term.height, self.title)
+        if key == self._frame_key:
+            return
 
-        self.start_loc = start_loc = _Position(round(self.origin[0] * term.width), round(self.origin[1] * term.height))
-        end_loc = _Position(round(self.offset[0] * term.width), round(self.offset[1] * term.height))
+        if self._layout_key != (term.width, term.height, bool(self.title)):
+            self.layout(term)
+        self._frame_key = key
 
-        self.dimensions = end_loc - start_loc
+        start_loc = self._outer_loc
         reset = term.move_down(1) + term.move_x(start_loc.x) #"\033[1E" + f"\033[{start_loc.x+1}G"
 
         top:    str = " " * (self.dimensions.x)
@@ -175,15 +225,7 @@ class tile():
 
         if self.border or self.title:
 
-            self.start_loc += (0, 1)
-            self.dimensions = end_loc - self.start_loc
-
             if self.border:
-                self.start_loc += (1, 0)
-                end_loc -= 1
-                self.dimensions = end_loc - self.start_loc
-
-
                 top = self.border[4] + self.border[0] * (self.dimensions.x) + self.border[5]
                 middle = self.border[2] + term.move_right(self.dimensions.x) + self.border[3]
                 bot = self.border[6] + self.border[1] * (self.dimensions.x) + self.border[7]
@@ -219,9 +261,9 @@ class tile():
         root = None
 
         if "partitions" in conf:
-            root = _tile_dict[conf["partitions"]["type"]].from_conf(conf["partitions"])
+            root = _partition_dict[conf["partitions"]["type"]].from_conf(conf["partitions"])
         else:
-            root = _tile_dict[conf["module"]].from_conf(conf)
+            root = registry[conf["module"]].from_conf(conf)
 
         return root
 
@@ -242,9 +284,16 @@ class split(tile):
                 t.scale((stop - start, 1))
                 t.move((start, 0))
 
+    def layout(self, term: bl.Terminal) -> None:
+        super(split, self).layout(term)
+
+        for t in self.sections:
+            t.layout(term)
+
     def render(self, term: bl.Terminal) -> None:
         for x in self.sections:
-            x.render(term)
+            with term.clip(*x.region):
+                x.render(term)
 
     def move(self, delta: Tuple[float, float]) -> None:
         super(split, self).move(delta)
@@ -271,11 +320,12 @@ class split(tile):
         Forces a complete redraw of the tile ensuring that all the content is overwritten
         """
         for t in self.sections:
-            t.redraw(term)
+            with term.clip(*t.region):
+                t.redraw(term)
 
         self.render(term)
 
-    def timing(self) -> Iterable[float]:
+    def timing(self) -> Iterable[Tuple[float, Any, str]]:
         return [y for x in self.sections for y in x.timing()]
 
     def __str__(self) -> str:
@@ -319,6 +369,12 @@ class tabbed(tile):
         self.active_tab.render(term)
         self.active_tab.title = tmp
 
+    def layout(self, term: bl.Terminal) -> None:
+        super(tabbed, self).layout(term)
+
+        for t in self.tabs:
+            t.layout(term)
+
     def move(self, delta:Tuple[float, float]) -> None:
         super(tabbed, self).move(delta)
 
@@ -385,9 +441,13 @@ class line_tile(tile):
         super(line_tile, self).__init__(*args, **kwargs)
         self.text = text
 
+    def layout(self, term: bl.Terminal) -> None:
+        super(line_tile, self).layout(term)
+        self._center = self.start_loc + self.dimensions/2
+
     def render(self, term: bl.Terminal) -> None:
         super(line_tile, self).render(term)
-        with term.location(*self.start_loc + self.dimensions/2 - (len(self.text)//2, 0)):
+        with term.location(self._center.x - len(self.text)//2, self._center.y):
             print(self.text, end="")
 
     def __str__(self) -> str:
@@ -397,20 +457,20 @@ class multi_line_tile(tile):
     def __init__(self, num_lines, *args, **kwargs) -> None:
         super(multi_line_tile, self).__init__(*args, **kwargs)
         self.positions = []
+        self.anchors: List[Tuple[int, int]] = []
         self._num_lines = num_lines
 
     def render(self, term: bl.Terminal) -> None:
         super(multi_line_tile, self).render(term)
 
-    def move(self, delta: Tuple[float, float]) -> None:
-        super(multi_line_tile, self).move(delta)
-
-        self.distribute_lines(self._num_lines)
-
-    def scale(self, scale: Union[Tuple[float, float], float]) -> None:
-        super(multi_line_tile, self).scale(scale)
+    def layout(self, term: bl.Terminal) -> None:
+        """
+        Distributes the lines over the tile and resolves the center of every line into the cell it is drawn around.
+        """
+        super(multi_line_tile, self).layout(term)
 
         self.distribute_lines(self._num_lines)
+        self.anchors = [(round(x * term.width), round(y * term.height)) for x, y in self.positions]
 
     def distribute_lines(self, num: int) -> None:
         N = self.offset[0] - self.origin[0]
@@ -433,174 +493,216 @@ class multi_line_tile(tile):
 
         self.positions = [(x, y) for x in pos_x for y in pos_y]
 
-class realtime_tile(tile):
-    def __init__(self, *args, **kwargs) -> None:
-        super(realtime_tile, self).__init__(*args, **kwargs)
-        self.module = rt.execution.procure(self, *args, **kwargs)
-
-class time_tile(line_tile, realtime_tile):
-    def __init__(self, *args, **kwargs) -> None:
-        kwargs.update({"func": time.time, "func_args": [], "func_kwargs": {}, "return_type": float, "text": ""})
-        super(time_tile, self).__init__(*args, **kwargs)
-
-    def render(self, term: bl.Terminal) -> None:
-        self.text = f"{self.module.fetch(self):.3f}"
-        super(time_tile, self).render(term)
-
-    @staticmethod
-    def from_conf(conf: Mapping[str, Any]):
-        return time_tile(**conf)
-
-class ctime_tile(line_tile, realtime_tile):
+class table_tile(tile):
+    """
+    A tile which shows a list of lines starting at its top left corner. Lines that do not fit the tile are cut off.
+    """
     def __init__(self, *args, **kwargs) -> None:
-        kwargs.update({"func": time.ctime, "func_args": [], "func_kwargs": {}, "return_type": float, "text": ""})
-        super(ctime_tile, self).__init__(*args, **kwargs)
+        super(table_tile, self).__init__(*args, **kwargs)
 
-    def render(self, term: bl.Terminal) -> None:
-        self.text = self.module.fetch(self)
-        super(ctime_tile, self).render(term)
+    def draw_lines(self, term: bl.Terminal, lines: List[str]) -> None:
+        lines = lines[:self.dimensions.y] + [""] * (self.dimensions.y - len(lines))
 
-    @staticmethod
-    def from_conf(conf: Mapping[str, Any]):
-        return ctime_tile(**conf)
+        with term.location(*self.start_loc):
+            print(f"{term.move_down(1) + term.move_x(self.start_loc.x)}".join(x[:self.dimensions.x].ljust(self.dimensions.x) for x in lines), end="")
 
-class cpu_tile(multi_line_tile, realtime_tile):
+class realtime_tile(tile):
     def __init__(self, *args, **kwargs) -> None:
-        kwargs.update({"num_lines": os.cpu_count(), "func": mo.CPU, "func_args": [], "func_kwargs": {"files": ["/proc/stat"]}, "return_type": list, "initial": [(0, 0)] * os.cpu_count(), "store_results": True})
-        super(cpu_tile, self).__init__(*args, **kwargs)
-
-    def render(self, term: bl.Terminal) -> None:
-        super(cpu_tile, self).render(term)
-
-        out = self.module.fetch(self)
-        while len(out) > 2:
-            out.pop(0)
+        super(realtime_tile, self).__init__(*args, **kwargs)
+        self.module = rt.execution.procure(self, *args, **kwargs)
 
-        cur = [(cl-ll)/max(ct-lt, 1) * 100 for (ll, lt), (cl, ct) in zip(*out)]
-        num_core_width = math.ceil(math.log10(os.cpu_count()+0.1))
-        strs = [f"Core {str(i).rjust(num_core_width)}: {x:5.1f}%" for i, x in enumerate(cur)]
+class plot_tile(realtime_tile):
+    """
+    A tile which plots a value between 0 and 1 as a bar per column
 
-        for (_x, _y), s in zip(self.positions, strs):
-            pos = _Position(_x * term.width, _y * term.height) - (len(s)//2, 0)
-            with term.location(*pos):
-                print(s, end="")
+    The glyphs of the columns are kept in a ring with the offset of the oldest column. Without a window every sample overwrites the oldest column, scrolls the region of the tile left by one column and draws only the new column, so an update costs O(height) regardless of how wide the tile is. The whole plot is only drawn again when the tile is resized or redrawn, or when a window is resampled.
 
-    @staticmethod
-    def from_conf(conf: Mapping[str, Any]):
-        return cpu_tile(**conf)
+    Args:
 
-class plot_tile(realtime_tile):
+        Window:
+            If given, the number of seconds spanned by the plot. Every value is kept in a time series with downsampled tiers and the plot is resampled to the width of the tile. Otherwise each column shows a single value.
+    """
     def __init__(self, *args, **kwargs) -> None:
-        self._raw_history = []
-        self._line_history = []
-        self.history = []
+        self._raw_history = st.ring(2, (2,))
+        self.history = st.ring(1, ())
+        self.window = kwargs.get("window")
+        self.series = st.series() if self.window else None
+
+        # The glyphs of every column from bottom to top, the offset of the oldest column, and whether the plot is shown as it is kept
+        self._columns: List[str] = []
+        self._head = 0
+        self._drawn = False
         super(plot_tile, self).__init__(*args, **kwargs)
 
     def render(self, term: bl.Terminal) -> None:
         super(plot_tile, self).render(term)
 
-        while len(self._line_history) < self.dimensions.x-1:
-            self._line_history.append(" " * self.dimensions.y)
-        while len(self._line_history) >= self.dimensions.x:
-            self._line_history.pop(0)
+        # The plot shows one column per sample, so nothing older than the width of the tile is kept
+        width, height = max(self.dimensions.x, 1), self.dimensions.y
+        self.history.resize(width)
 
-        while len(self._raw_history) < self.dimensions.x-1:
-            self._raw_history.append((0, 0))
-        while len(self._raw_history) >= self.dimensions.x:
-            self._raw_history.pop(0)
+        if len(self._columns) != width or (self._columns and len(self._columns[0]) != height):
+            # The glyphs depend on the height of the tile, so the columns are rebuilt from the recorded values
+            self._columns = [" " * height] * (width - len(self.history)) + [self._column(x) for x in self.history]
+            self._head = 0
+            self._drawn = False
 
-        while len(self.history) >= self.dimensions.x:
-            self.history.pop(0)
+    def redraw(self, term: bl.Terminal) -> None:
+        self._drawn = False
+        super(plot_tile, self).redraw(term)
+
+    def record(self, value: float) -> None:
+        """
+        Adds a value to the plot. Tiles only record when their execution has a new sample, and a plot drawn without one repeats the last value instead of showing a gap.
+        """
+        self.history.append(value)
+        if self.series is not None:
+            self.series.append(time.monotonic(), value)
 
     def plot(self, term: bl.Terminal):
-        decimal, integer = math.modf(self.history[-1]*self.dimensions.y)
+        x, y = self.start_loc
+        width, height = len(self._columns), self.dimensions.y
+
+        if self.series is None:
+            column = self._column(self.history[-1] if len(self.history) else 0.0)
+            self._columns[self._head] = column
+            self._head = (self._head + 1) % width
+
+            if self._drawn:
+                term.scroll(x, y, width, height)
+                self.text = "".join(term.move_xy(x + width - 1, y + i) + column[-1-i] for i in range(height))
+                return
+        else:
+            last = 0.0
+            for i, v in enumerate(self.series.window(self.window, width, time.monotonic())):
+                last = v if v is not None else last
+                self._columns[i] = self._column(last)
+            self._head = 0
+
+        rows = _rotate_strings(self._columns[self._head:] + self._columns[:self._head])
+        self.text = "".join(term.move_xy(x, y + i) + row for i, row in enumerate(rows))
+        self._drawn = True
+
+    def _column(self, value: float) -> str:
+        decimal, integer = math.modf(value*self.dimensions.y)
         s = f"{'█' * int(integer)}" + _line_subdivisions[min_diff(range(9), decimal)/8]
-        s = s.ljust(self.dimensions.y)
-        self._line_history.append(s)
-
-        vert_lines = _rotate_strings(self._line_history)
-
-        self.text = f"{term.move_down(1) + term.move_x(self.start_loc.x)}".join(vert_lines)
-
-class cpu_load_tile(plot_tile):
-    def __init__(self, *args, **kwargs) -> None:
-        kwargs.update({"func": mo.CPU_LOAD, "func_args": [], "func_kwargs": {"files": ["/proc/stat"]}, "return_type": float, "initial": (0, 0)})
-        super(cpu_load_tile, self).__init__(*args, **kwargs)
-        self._raw_history.append((0, 0))
-
-    def render(self, term: bl.Terminal) -> None:
-        super(cpu_load_tile, self).render(term)
-
-        self._raw_history.append(self.module.fetch(self))
-        last = self._raw_history[-2]
-        cur = self._raw_history[-1]
-        self.history.append((cur[0]-last[0])/max(cur[1]-last[1], 1))
+        return s.ljust(self.dimensions.y)[:self.dimensions.y]
 
-        super(cpu_load_tile, self).plot(term)
-
-        with term.location(*self.start_loc):
-            print(self.text, end="")
-
-    @staticmethod
-    def from_conf(conf: Mapping[str, Any]):
-        return cpu_load_tile(**conf)
-
-class ram_tile(multi_line_tile, realtime_tile):
-    def __init__(self, *args, **kwargs) -> None:
-        kwargs.update({"num_lines": 4, "func": mo.RAM, "func_args": [], "func_kwargs": {"files": ["/proc/meminfo"]}, "return_type": tuple, "initial": ((0, ""), (0, ""), (0, ""))})
-        super(ram_tile, self).__init__(*args, **kwargs)
+class tile_registry():
+    """
+    Maps the `module` names used in configurations to the tiles that implement them.
 
-    def render(self, term: bl.Terminal) -> None:
-        super(ram_tile, self).render(term)
+    Tiles are registered by the dotted path of the object providing their `from_conf`, given as `package.module:attribute`, and the module is only imported the first time a configuration uses the tile. Startup time and memory therefore only depend on the tiles a configuration uses, not on how many are available.
 
-        out = self.module.fetch(self)
+    Besides the built in tiles, tiles are found through the `observ.tiles` entry point group of installed packages and in plugin directories. Every `.py` file of a plugin directory provides the tile named after the file, with underscores read as spaces, through its own `from_conf` function.
 
-        names = ["Free:", "In Use:", "Available:", "Total:"]
+    Args:
 
-        strs = [f"{_type.ljust(max([len(x) for x in names]))} {x:.2f} {size + 'B' if size != 'B' else size}" for _type, (x, size) in zip(names, out)]
+        Paths:
+            A mapping from tile names to the dotted paths of the tiles
+    """
+    def __init__(self, paths: Mapping[str, str]) -> None:
+        self._paths: Dict[str, str] = dict(paths)
+        self._loaded: Dict[str, Any] = {}
+        self._discovered = False
 
-        for (_x, _y), s in zip(self.positions, strs):
-            pos = _Position(_x * term.width, _y * term.height) - (len(s)//2, 0)
-            with term.location(*pos):
-                print(s, end="")
+    def register(self, name: str, path: str) -> None:
+        self._paths[name] = path
+        self._loaded.pop(name, None)
 
-    @staticmethod
-    def from_conf(conf: Mapping[str, Any]):
-        return ram_tile(**conf)
+    def add_directory(self, directory: str) -> None:
+        """
+        Registers every plugin file of a directory. The files are not imported until one of their tiles is used.
+        """
+        directory = os.path.abspath(os.path.expanduser(directory))
+        for x in sorted(os.scandir(directory), key=lambda x: x.name):
+            if x.is_file() and x.name.endswith(".py") and not x.name.startswith("_"):
+                self.register(x.name[:-3].replace("_", " "), x.path)
 
-class ram_load_tile(plot_tile):
-    def __init__(self, *args, **kwargs) -> None:
-        kwargs.update({"func": mo.RAM_LOAD, "func_args": [], "func_kwargs": {"files": ["/proc/meminfo"]}, "return_type": float})
-        super(ram_load_tile, self).__init__(*args, **kwargs)
-        self._raw_history.append((0, 0))
+    def names(self) -> List[str]:
+        self._discover()
+        return sorted(self._paths)
 
-    def render(self, term: bl.Terminal) -> None:
-        super(ram_load_tile, self).render(term)
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._loaded:
+            if name not in self._paths:
+                self._discover()
+            assert name in self._paths, f"No tile called {name}. The available tiles are: {', '.join(self.names())}"
 
-        self.history.append(self.module.fetch(self))
+            logging.debug(f"Loading tile {name} from {self._paths[name]}")
+            self._loaded[name] = _load(self._paths[name])
 
-        super(ram_load_tile, self).plot(term)
+        return self._loaded[name]
 
-        with term.location(*self.start_loc):
-            print(self.text, end="")
+    def __contains__(self, name: str) -> bool:
+        self._discover()
+        return name in self._paths
 
-    @staticmethod
-    def from_conf(conf: Mapping[str, Any]):
-        return ram_load_tile(**conf)
+    def _discover(self) -> None:
+        """
+        Registers the tiles of installed packages and of the directories in the plugin path. Only the metadata is read, so nothing is imported.
+        """
+        if self._discovered:
+            return
+        self._discovered = True
 
+        # Reading the metadata of the installed packages takes a while, so it is only done once a tile is not found among the registered ones
+        from importlib import metadata
+        for ep in metadata.entry_points(group=_entry_point_group):
+            self._paths.setdefault(ep.name, ep.value)
 
+        for directory in os.environ.get(_plugin_path_variable, "").split(os.pathsep):
+            if directory and os.path.isdir(directory):
+                self.add_directory(directory)
 
-_tile_dict = {
+def _load(path: str) -> Any:
+    """
+    Imports the object a dotted `package.module:attribute` path or the path of a plugin file refers to.
+    """
+    if path.endswith(".py"):
+        name = f"observ_plugins.{os.path.basename(path)[:-3]}"
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        return module
+
+    module, _, attribute = path.partition(":")
+    obj = importlib.import_module(module)
+    for x in attribute.split(".") if attribute else []:
+        obj = getattr(obj, x)
+    return obj
+
+def load_plugins(directories: Iterable[str]) -> None:
+    for x in directories:
+        registry.add_directory(x)
+
+_partition_dict = {
     "tiled": split,
     "tabbed": tabbed,
-    "time": time_tile,
-    "ctime": ctime_tile,
-    "cpu": cpu_tile,
-    "cpu load": cpu_load_tile,
-    "ram": ram_tile,
-    "ram load": ram_load_tile,
 }
 
+registry = tile_registry({
+    "time": "tiles.clock:time_tile",
+    "ctime": "tiles.clock:ctime_tile",
+    "cpu": "tiles.cpu:cpu_tile",
+    "cpu load": "tiles.cpu:cpu_load_tile",
+    "ram": "tiles.memory:ram_tile",
+    "ram load": "tiles.memory:ram_load_tile",
+    "swap": "tiles.memory:swap_tile",
+    "processes": "tiles.processes:process_tile",
+    "disk": "tiles.disk:disk_tile",
+    "network": "tiles.network:network_tile",
+    "thermal": "tiles.thermal:thermal_tile",
+    "containers": "tiles.containers:container_tile",
+    "pressure": "tiles.pressure:pressure_tile",
+})
+
+_entry_point_group = "observ.tiles"
+_plugin_path_variable = "OBSERV_PLUGIN_PATH"
+
+_size_units = ["kB", "MB", "GB", "TB", "PB"]
+
 _line_subdivisions = {
     0/8: " ",
     1/8: "▁",